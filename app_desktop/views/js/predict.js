@@ -19,6 +19,7 @@ form.addEventListener('submit', async e=>{
   if(!file) { alert('Selecciona una imagen'); return; }
   const fd = new FormData();
   fd.append('file', file);
+  fd.append('save', 'true');
 
   resultDiv.innerHTML = 'Procesando...';
   try {
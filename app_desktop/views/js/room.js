@@ -4,15 +4,21 @@
   const params = new URLSearchParams(window.location.search);
   const sessionId = params.get("session_id") || "1";
   const token = params.get("token") || "";
+  // "binary" (por defecto): cabecera de 8 bytes + JPEG crudo; "json": data URL en base64
+  const mode = params.get("mode") === "json" ? "json" : "binary";
 
   const wsUrl = `${location.protocol === "https:" ? "wss" : "ws"}://${location.host}/ws/predict/${sessionId}`;
   const ws = new WebSocket(wsUrl);
+  ws.binaryType = "arraybuffer";
 
-  ws.onopen = () => console.log("WS conectado");
+  ws.onopen = () => console.log(`WS conectado (modo ${mode})`);
   ws.onmessage = (ev) => {
     const data = JSON.parse(ev.data);
     if (data.type === "prediction") {
-      document.getElementById("result").innerText = `Emoción: ${data.emotion} | Confianza: ${(data.confidence*100).toFixed(1)}%`;
+      const faces = data.faces && data.faces.length > 1 ? data.faces : [data];
+      document.getElementById("result").innerText = faces
+        .map((f) => `Emoción: ${f.emotion} | Confianza: ${(f.confidence*100).toFixed(1)}%`)
+        .join("\n");
     }
   };
 
@@ -25,14 +31,42 @@
   canvas.width = 320; canvas.height = 240;
   const ctx = canvas.getContext("2d");
 
+  // Cabecera binaria: magic "EM" | versión 1 | tipo 1 (JPEG) | seq uint32 big-endian
+  const HEADER_SIZE = 8;
+  let seq = 0;
+
+  function sendBinaryFrame() {
+    canvas.toBlob(async (blob) => {
+      if (!blob || ws.readyState !== WebSocket.OPEN) return;
+      const jpeg = new Uint8Array(await blob.arrayBuffer());
+      const msg = new Uint8Array(HEADER_SIZE + jpeg.length);
+      const view = new DataView(msg.buffer);
+      view.setUint8(0, 0x45); // "E"
+      view.setUint8(1, 0x4d); // "M"
+      view.setUint8(2, 1);
+      view.setUint8(3, 1);
+      view.setUint32(4, seq++ >>> 0, false);
+      msg.set(jpeg, HEADER_SIZE);
+      ws.send(msg.buffer);
+    }, "image/jpeg", 0.6);
+  }
+
+  function sendJsonFrame() {
+    const dataUrl = canvas.toDataURL("image/jpeg", 0.6); // base64 jpeg
+    if (ws.readyState === WebSocket.OPEN) {
+      ws.send(JSON.stringify({ type: "frame", data: dataUrl }));
+    }
+  }
+
   // send frame every interval ms
   const INTERVAL_MS = 800; // ajustar (200-1000)
   setInterval(() => {
     try {
       ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
-      const dataUrl = canvas.toDataURL("image/jpeg", 0.6); // base64 jpeg
-      if (ws.readyState === WebSocket.OPEN) {
-        ws.send(JSON.stringify({ type: "frame", data: dataUrl }));
+      if (mode === "binary") {
+        sendBinaryFrame();
+      } else {
+        sendJsonFrame();
       }
     } catch (e) {
       console.error(e);
@@ -0,0 +1,336 @@
+# backend/broker.py
+"""
+Pub/sub para repartir predicciones y mensajes de chat entre workers y nodos.
+- memory://            un solo proceso (por defecto, desarrollo)
+- redis://host:port    cualquier servidor que hable el protocolo de Redis (RESP):
+                       Redis real o el broker local de este módulo
+                       (python -m backend.broker --port 6390)
+
+Cada router publica en un canal ("predict:<sesión>", "chat:<usuario>") y los
+workers que tienen a los destinatarios conectados reciben el mensaje y lo
+entregan a sus WebSockets locales.
+"""
+import os
+import asyncio
+import argparse
+from urllib.parse import urlparse
+
+BROKER_URL = os.getenv("BROKER_URL", "memory://")
+BROKER_RECONNECT_SECONDS = 1.0
+# Mensajes en espera por suscriptor; si no da abasto se descartan los que no caben
+BROKER_SUBSCRIBER_QUEUE = int(os.getenv("BROKER_SUBSCRIBER_QUEUE", "256"))
+# Broker local: bytes sin enviar a un suscriptor antes de desconectarlo (como el
+# client-output-buffer-limit pubsub de Redis); al reconectar vuelve a suscribirse
+BROKER_MAX_CLIENT_BUFFER = int(os.getenv("BROKER_MAX_CLIENT_BUFFER", str(8 * 1024 * 1024)))
+
+
+class _Subscriber:
+    """
+    Cola acotada y tarea propia para un callback: el reparto solo encola, así un
+    suscriptor lento no retrasa al resto de canales ni a los demás suscriptores.
+    """
+
+    def __init__(self, channel: str, callback, broker, max_messages=BROKER_SUBSCRIBER_QUEUE):
+        self.channel = channel
+        self.callback = callback
+        self.broker = broker
+        self.queue = asyncio.Queue(max_messages)
+        self.task = asyncio.create_task(self._deliver())
+
+    def put(self, message: str):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.broker.dropped += 1
+
+    async def _deliver(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await self.callback(message)
+                self.broker.delivered += 1
+            except Exception as e:
+                print(f"⚠️ Error entregando mensaje del canal {self.channel}: {e}")
+
+    def close(self):
+        self.task.cancel()
+
+
+class Broker:
+    """Suscripciones locales por canal; las subclases deciden cómo viaja cada publicación."""
+
+    backend = "base"
+
+    def __init__(self):
+        self._callbacks: dict[str, dict] = {}  # canal -> {callback: _Subscriber}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    async def publish(self, channel: str, message: str):
+        raise NotImplementedError
+
+    async def subscribe(self, channel: str, callback):
+        """callback: corrutina que recibe el mensaje (str), en orden y desde su propia tarea."""
+        callbacks = self._callbacks.setdefault(channel, {})
+        if callback not in callbacks:
+            callbacks[callback] = _Subscriber(channel, callback, self)
+
+    async def unsubscribe(self, channel: str, callback):
+        callbacks = self._callbacks.get(channel)
+        if callbacks is not None:
+            subscriber = callbacks.pop(callback, None)
+            if subscriber is not None:
+                subscriber.close()
+            if not callbacks:
+                self._callbacks.pop(channel, None)
+
+    def _dispatch(self, channel: str, message: str):
+        """Encola el mensaje para cada suscriptor del canal; nunca espera a ninguno."""
+        for subscriber in list(self._callbacks.get(channel, {}).values()):
+            subscriber.put(message)
+
+    async def close(self):
+        for callbacks in self._callbacks.values():
+            for subscriber in callbacks.values():
+                subscriber.close()
+        self._callbacks.clear()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "channels": len(self._callbacks),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+class MemoryBroker(Broker):
+    backend = "memory"
+
+    async def publish(self, channel: str, message: str):
+        self.published += 1
+        self._dispatch(channel, message)
+
+
+# ========================
+# 🔌 Protocolo RESP (subconjunto de Redis para pub/sub)
+# ========================
+def _bulk(arg) -> bytes:
+    if isinstance(arg, str):
+        arg = arg.encode()
+    return b"$%d\r\n%s\r\n" % (len(arg), arg)
+
+
+def encode_command(*args) -> bytes:
+    return b"*%d\r\n" % len(args) + b"".join(_bulk(arg) for arg in args)
+
+
+async def read_reply(reader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("El broker cerró la conexión")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        raise RuntimeError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        size = int(rest)
+        return None if size < 0 else (await reader.readexactly(size + 2))[:-2]
+    if kind == b"*":
+        size = int(rest)
+        return None if size < 0 else [await read_reply(reader) for _ in range(size)]
+    raise ConnectionError(f"Respuesta inválida del broker: {line!r}")
+
+
+class RedisBroker(Broker):
+    """
+    Dos conexiones: una para PUBLISH y otra en modo suscripción con una tarea que
+    escucha. Si el broker se cae, la escucha reconecta y vuelve a suscribir todos los canales.
+    """
+
+    backend = "redis"
+
+    def __init__(self, host: str, port: int):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self._pub = None
+        self._pub_lock = asyncio.Lock()
+        self._sub_writer = None
+        self._listener = None
+        self.reconnects = 0
+
+    async def publish(self, channel: str, message: str):
+        async with self._pub_lock:
+            for attempt in range(2):
+                try:
+                    if self._pub is None:
+                        self._pub = await asyncio.open_connection(self.host, self.port)
+                    reader, writer = self._pub
+                    writer.write(encode_command("PUBLISH", channel, message))
+                    await writer.drain()
+                    await read_reply(reader)
+                    self.published += 1
+                    return
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # Conexión rota: se reabre una vez antes de fallar
+                    self._pub = None
+                    if attempt:
+                        raise
+
+    async def _send_sub(self, *command):
+        if self._sub_writer is not None:
+            try:
+                self._sub_writer.write(encode_command(*command))
+                await self._sub_writer.drain()
+            except ConnectionError:
+                # La escucha reconecta y re-suscribe todo
+                pass
+
+    async def subscribe(self, channel: str, callback):
+        first = channel not in self._callbacks
+        await super().subscribe(channel, callback)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        elif first:
+            await self._send_sub("SUBSCRIBE", channel)
+
+    async def unsubscribe(self, channel: str, callback):
+        await super().unsubscribe(channel, callback)
+        if channel not in self._callbacks:
+            await self._send_sub("UNSUBSCRIBE", channel)
+
+    async def _listen(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                # Primero se publica el writer: los canales que lleguen durante el drain no se pierden
+                self._sub_writer = writer
+                if self._callbacks:
+                    writer.write(encode_command("SUBSCRIBE", *self._callbacks))
+                    await writer.drain()
+                while True:
+                    reply = await read_reply(reader)
+                    if isinstance(reply, list) and reply[0] == b"message":
+                        self._dispatch(reply[1].decode(), reply[2].decode())
+            except Exception as e:
+                # Además de los cortes de red, un -ERR del broker (p. ej. -NOAUTH al suscribir)
+                # o una respuesta corrupta: la escucha nunca termina sin avisar, reconecta
+                if self._sub_writer is not None:
+                    self._sub_writer.close()
+                self._sub_writer = None
+                self.reconnects += 1
+                print(f"⚠️ Broker {self.host}:{self.port} no disponible ({e}), reintentando...")
+                await asyncio.sleep(BROKER_RECONNECT_SECONDS)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+        for writer in (self._sub_writer, self._pub[1] if self._pub else None):
+            if writer is not None:
+                writer.close()
+        self._pub = self._sub_writer = None
+        await super().close()
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "url": f"redis://{self.host}:{self.port}",
+            "connected": self._sub_writer is not None,
+            "reconnects": self.reconnects,
+        }
+
+
+def create_broker(url: str) -> Broker:
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryBroker()
+    if parsed.scheme == "redis":
+        return RedisBroker(parsed.hostname or "127.0.0.1", parsed.port or 6379)
+    raise ValueError(f"BROKER_URL inválido: {url}")
+
+
+# Un broker por proceso, compartido por todos los routers
+broker = create_broker(BROKER_URL)
+
+
+# ========================
+# 🛰️ Broker local (sustituto de Redis para pub/sub)
+# ========================
+class LocalBrokerServer:
+    """Implementa SUBSCRIBE, UNSUBSCRIBE, PUBLISH y PING del protocolo de Redis."""
+
+    def __init__(self, max_client_buffer=BROKER_MAX_CLIENT_BUFFER):
+        self.channels: dict[bytes, set] = {}
+        self.max_client_buffer = max_client_buffer
+        self.disconnected = 0
+
+    def _publish(self, channel: bytes, message: bytes) -> int:
+        subscribers = list(self.channels.get(channel, ()))
+        push = encode_command("message", channel, message)
+        for writer in subscribers:
+            # Sin drain: un suscriptor que no lee acumularía en memoria todo lo publicado
+            if writer.transport.get_write_buffer_size() + len(push) > self.max_client_buffer:
+                self._drop_subscriber(writer)
+                continue
+            writer.write(push)
+        return len(subscribers)
+
+    def _drop_subscriber(self, writer):
+        for subscribers in self.channels.values():
+            subscribers.discard(writer)
+        self.disconnected += 1
+        print("⚠️ Suscriptor desconectado: no consume los mensajes")
+        writer.transport.abort()
+
+    async def handle(self, reader, writer):
+        subscribed = set()
+        try:
+            while True:
+                command = await read_reply(reader)
+                name = command[0].decode().upper()
+                if name in ("SUBSCRIBE", "UNSUBSCRIBE"):
+                    for channel in command[1:] or list(subscribed):
+                        if name == "SUBSCRIBE":
+                            self.channels.setdefault(channel, set()).add(writer)
+                            subscribed.add(channel)
+                        else:
+                            self.channels.get(channel, set()).discard(writer)
+                            subscribed.discard(channel)
+                        writer.write(b"*3\r\n" + _bulk(name.lower()) + _bulk(channel) + b":%d\r\n" % len(subscribed))
+                elif name == "PUBLISH":
+                    writer.write(b":%d\r\n" % self._publish(command[1], command[2]))
+                elif name == "PING":
+                    writer.write(b"+PONG\r\n")
+                else:
+                    writer.write(f"-ERR comando no soportado '{name}'\r\n".encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for channel in subscribed:
+                self.channels.get(channel, set()).discard(writer)
+            writer.close()
+
+
+async def serve_local_broker(host: str, port: int):
+    server = await asyncio.start_server(LocalBrokerServer().handle, host, port)
+    print(f"📡 Broker local escuchando en redis://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve_local_broker(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
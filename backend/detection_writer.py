@@ -0,0 +1,179 @@
+# backend/detection_writer.py
+import os
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from backend.database import SessionLocal
+from backend.models import Detection, SessionModel, Appointment
+
+# ========================
+# 💾 Historial de emociones de las sesiones en vivo
+# ========================
+DETECTIONS_PERSIST = os.getenv("DETECTIONS_PERSIST", "1") == "1"
+# Se inserta en bloque al juntar este número de filas o al pasar este tiempo
+DETECTIONS_BATCH_SIZE = int(os.getenv("DETECTIONS_BATCH_SIZE", "200"))
+DETECTIONS_FLUSH_SECONDS = float(os.getenv("DETECTIONS_FLUSH_SECONDS", "2"))
+# Filas en espera como máximo; si la BD no da abasto, las nuevas se descartan
+DETECTIONS_MAX_QUEUE = int(os.getenv("DETECTIONS_MAX_QUEUE", "10000"))
+
+
+class DetectionWriter:
+    """
+    Escritura diferida de Detection: record() encola sin esperar y una tarea
+    inserta por lotes (bulk insert) en un hilo, fuera del event loop.
+    patient_id y psychologist_id salen de la cita de la sesión, una consulta por sesión.
+    """
+
+    def __init__(self, batch_size=DETECTIONS_BATCH_SIZE, flush_seconds=DETECTIONS_FLUSH_SECONDS,
+                 max_queue=DETECTIONS_MAX_QUEUE, enabled=DETECTIONS_PERSIST):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_queue = max_queue
+        self.enabled = enabled
+        self._queue = None
+        self._task = None
+        self._participants: dict[int, tuple] = {}  # session_id -> (patient_id, psychologist_id)
+        self.written = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.flushes = 0
+        self.errors = 0
+
+    def _ensure_worker(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.create_task(self._run())
+
+    def record(self, session_id: int, emotion: str, confidence: float, image_name: str):
+        if not self.enabled:
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait({
+                "session_id": session_id,
+                "image_name": image_name,
+                "emotion": emotion,
+                "confidence": str(round(confidence, 4)),
+                "detected_at": datetime.utcnow(),
+            })
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            row = await self._queue.get()
+            if row is None:
+                break
+            batch = [row]
+            deadline = loop.time() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    closing = True
+                    break
+                batch.append(row)
+            try:
+                await asyncio.to_thread(self._insert, batch)
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Error guardando {len(batch)} detecciones: {e}")
+
+    def _attach_participants(self, db, rows: list) -> list:
+        """Completa patient_id/psychologist_id de cada fila; descarta las de sesiones inexistentes."""
+        missing = {r["session_id"] for r in rows if r["session_id"] is not None} - self._participants.keys()
+        if missing:
+            found = (
+                db.query(SessionModel.id, Appointment.patient_id, Appointment.psychologist_id)
+                .outerjoin(Appointment, SessionModel.appointment_id == Appointment.id)
+                .filter(SessionModel.id.in_(missing))
+                .all()
+            )
+            for sid, patient_id, psychologist_id in found:
+                self._participants[sid] = (patient_id, psychologist_id)
+        valid = []
+        for r in rows:
+            if r["session_id"] is None:
+                valid.append(r)
+                continue
+            # Sesiones que no existen en la BD no se pueden referenciar
+            if r["session_id"] not in self._participants:
+                self.skipped += 1
+                continue
+            r["patient_id"], r["psychologist_id"] = self._participants[r["session_id"]]
+            valid.append(r)
+        return valid
+
+    def _insert(self, rows: list):
+        db = SessionLocal()
+        try:
+            valid = self._attach_participants(db, rows)
+            if valid:
+                db.bulk_insert_mappings(Detection, valid)
+                db.commit()
+                self.written += len(valid)
+                self.flushes += 1
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def insert_now(self, rows: list) -> list:
+        """
+        Inserta ya, en una sola sentencia, y devuelve los ids (None en las filas descartadas).
+        Para /predict, que responde con el id de cada detección; corre en un hilo.
+        """
+        db = SessionLocal()
+        try:
+            for r in rows:
+                r.setdefault("detected_at", datetime.utcnow())
+            valid = self._attach_participants(db, rows)
+            ids = {}
+            if valid:
+                result = db.execute(
+                    insert(Detection).returning(Detection.id, sort_by_parameter_order=True), valid
+                )
+                ids = {id(r): detection_id for r, detection_id in zip(valid, result.scalars())}
+                db.commit()
+                self.written += len(valid)
+            return [ids.get(id(r)) for r in rows]
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def forget(self, session_id: int):
+        self._participants.pop(session_id, None)
+
+    async def drain(self, timeout: float = 10):
+        """Inserta lo pendiente y detiene la tarea (al apagar el servidor)."""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.put(None)
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Se perdieron {self._queue.qsize()} detecciones al apagar")
+            self._task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "flushes": self.flushes,
+            "dropped": self.dropped,
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
+
+
+detection_writer = DetectionWriter()
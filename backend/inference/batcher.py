@@ -0,0 +1,114 @@
+# backend/inference/batcher.py
+import os
+import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from backend.inference.metrics import STAGE_SECONDS, FACES_PREDICTED
+
+# ========================
+# ⚙️ Configuración del micro-batching
+# ========================
+MAX_BATCH_SIZE = int(os.getenv("PREDICT_MAX_BATCH_SIZE", "16"))
+MAX_WAIT_MS = float(os.getenv("PREDICT_MAX_WAIT_MS", "5"))
+
+
+class BatchScheduler:
+    """
+    Junta en una cola compartida las ROIs de todas las sesiones activas y
+    ejecuta un solo forward pass por lote.
+    - predict_fn: recibe un array (N, h, w, c) y devuelve (N, n_classes)
+    - el lote sale cuando llega a max_batch_size o vence max_wait_ms
+    - el forward pass corre en un hilo propio para no bloquear el event loop
+    """
+
+    def __init__(self, predict_fn, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.predict_fn = predict_fn
+        # Un solo hilo: TensorFlow ya paraleliza cada lote internamente
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="inference")
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self.batch_histogram: Counter = Counter()
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def submit(self, roi: np.ndarray) -> np.ndarray:
+        """Encola una ROI y espera su vector de probabilidades."""
+        return (await self.submit_many([roi]))[0]
+
+    async def submit_many(self, rois) -> list:
+        """Encola juntas las ROIs de un frame (varios rostros) para que compartan lote."""
+        self._ensure_worker()
+        loop = asyncio.get_running_loop()
+        futs = [loop.create_future() for _ in rois]
+        now = loop.time()
+        for roi, fut in zip(rois, futs):
+            self._queue.put_nowait((roi, fut, now))
+        return await asyncio.gather(*futs)
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            # Lo que ya esté en cola entra sin esperar
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Las sesiones que se cerraron mientras esperaban no ocupan sitio
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+            self.batch_histogram[len(batch)] += 1
+            start = loop.time()
+            for _, _, queued_at in batch:
+                STAGE_SECONDS.observe(start - queued_at, stage="queue_wait")
+            try:
+                rois = np.stack([roi for roi, _, _ in batch])
+                preds = await loop.run_in_executor(self._executor, self.predict_fn, rois)
+            except Exception as e:
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            STAGE_SECONDS.observe(loop.time() - start, stage="infer")
+            FACES_PREDICTED.inc(len(batch))
+            for (_, fut, _), p in zip(batch, preds):
+                if not fut.done():
+                    fut.set_result(p)
+
+    def shutdown(self):
+        if self._worker is not None:
+            self._worker.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        total = sum(self.batch_histogram.values())
+        items = sum(size * count for size, count in self.batch_histogram.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": total,
+            "avg_batch_size": round(items / total, 2) if total else 0.0,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self.batch_histogram.items())},
+        }
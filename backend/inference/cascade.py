@@ -0,0 +1,44 @@
+# backend/inference/cascade.py
+import os
+
+import numpy as np
+
+# ========================
+# 🪜 Cascada: modelo ligero primero, el pesado solo si hay duda
+# ========================
+# Versión del registro con el modelo ligero (ia/model.py); vacío: sin cascada
+CASCADE_LIGHT_VERSION = os.getenv("CASCADE_LIGHT_VERSION", "")
+# Un rostro pasa al modelo pesado si la clase más probable no llega a esta confianza...
+CASCADE_MIN_CONFIDENCE = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.6"))
+# ...o si le saca menos de este margen a la segunda
+CASCADE_MIN_MARGIN = float(os.getenv("CASCADE_MIN_MARGIN", "0.2"))
+
+
+def escalation_mask(probs, min_confidence=CASCADE_MIN_CONFIDENCE, min_margin=CASCADE_MIN_MARGIN) -> np.ndarray:
+    """(N, n_clases) del modelo ligero -> (N,) bool: qué rostros necesita ver el modelo pesado."""
+    probs = np.asarray(probs, dtype=np.float32)
+    top2 = np.partition(probs, -2, axis=-1)[:, -2:]
+    return (top2[:, 1] < min_confidence) | (top2[:, 1] - top2[:, 0] < min_margin)
+
+
+class CascadeStats:
+    """Cuántos rostros vio cada etapa, para la tasa de escalado en /inference/stats."""
+
+    def __init__(self, min_confidence=CASCADE_MIN_CONFIDENCE, min_margin=CASCADE_MIN_MARGIN):
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin
+        self.faces = 0
+        self.escalated = 0
+
+    def record(self, faces: int, escalated: int):
+        self.faces += faces
+        self.escalated += escalated
+
+    def stats(self) -> dict:
+        return {
+            "min_confidence": self.min_confidence,
+            "min_margin": self.min_margin,
+            "faces": self.faces,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / self.faces, 3) if self.faces else None,
+        }
@@ -0,0 +1,162 @@
+# backend/inference/client.py
+import os
+import asyncio
+
+import numpy as np
+
+from backend.inference.ipc import FrameRing, encode_message, read_message
+
+# ========================
+# ⚙️ Anillo de cada worker de la API
+# ========================
+RING_SLOTS = int(os.getenv("INFERENCE_RING_SLOTS", "32"))
+RING_SLOT_BYTES = int(os.getenv("INFERENCE_RING_SLOT_BYTES", str(1024 * 1024)))
+
+
+class InferenceClient:
+    """
+    Cliente del servidor de inferencia (backend/inference/server.py) para un worker.
+    El frame se copia una vez a un hueco del anillo compartido y por el socket
+    solo viaja la referencia; si el anillo está lleno o el frame no cabe, va en el mensaje.
+    """
+
+    def __init__(self, socket_path: str, slots=RING_SLOTS, slot_bytes=RING_SLOT_BYTES):
+        self.socket_path = socket_path
+        self.ring = FrameRing.create(slots, slot_bytes)
+        self.inline_frames = 0
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        # Peticiones sin respuesta de cada conexión: la tarea de lectura de una conexión
+        # vieja solo falla las suyas, nunca las de la que la reemplazó
+        self._pending: dict[object, dict[int, asyncio.Future]] = {}
+        self._next_id = 0
+
+    async def _connection(self):
+        """(writer, pendientes) de la conexión actual; la abre si no hay o se cerró."""
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                self._reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+                self._pending[self._writer] = {}
+                self._read_task = asyncio.create_task(self._read_responses(self._reader, self._writer))
+        return self._writer, self._pending[self._writer]
+
+    async def _read_responses(self, reader, writer):
+        pending = self._pending[writer]
+        try:
+            while True:
+                header, _ = await read_message(reader)
+                fut = pending.pop(header.get("id"), None)
+                if fut is not None and not fut.done():
+                    fut.set_result(header)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            error = ConnectionError(f"Servidor de inferencia desconectado: {e}")
+        except asyncio.CancelledError:
+            error = ConnectionError("Cliente de inferencia cerrado")
+        except Exception as e:
+            # Mensaje corrupto (JSON, cabecera): el flujo ya no está alineado, se abandona la conexión
+            error = ConnectionError(f"Respuesta inválida del servidor de inferencia: {e!r}")
+        # Fallar las pendientes dispara sus on_done: los huecos del anillo se liberan
+        for fut in pending.values():
+            if not fut.done():
+                fut.set_exception(error)
+        pending.clear()
+        self._pending.pop(writer, None)
+        writer.close()
+        if self._writer is writer:
+            self._writer = None
+
+    @staticmethod
+    def _settled(fut, on_done):
+        # Si el que esperaba ya se canceló nadie lee el error: se marca como leído
+        if not fut.cancelled():
+            fut.exception()
+        if on_done is not None:
+            on_done()
+
+    async def request(self, header: dict, payload=b"", on_done=None) -> dict:
+        """
+        on_done se llama una sola vez cuando el servidor ya no va a leer nada de esta
+        petición: al llegar su respuesta o error, si se cae la conexión, o enseguida si
+        el mensaje ni siquiera se envió. Cancelar al que espera no lo adelanta.
+        """
+        sent = False
+        fut = None
+        try:
+            writer, pending = await self._connection()
+            self._next_id += 1
+            header = {**header, "id": self._next_id}
+            fut = asyncio.get_running_loop().create_future()
+            fut.add_done_callback(lambda f: self._settled(f, on_done))
+            pending[self._next_id] = fut
+            async with self._write_lock:
+                writer.write(encode_message(header, payload))
+                sent = True
+                await writer.drain()
+        except BaseException:
+            if not sent:
+                if fut is not None:
+                    pending.pop(header["id"], None)
+                    fut.cancel()
+                elif on_done is not None:
+                    on_done()
+            raise
+        # shield: si cancelan esta corrutina la petición sigue pendiente hasta la respuesta
+        response = await asyncio.shield(fut)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    async def predict_frame(self, sid: int | None, jpeg):
+        """Devuelve [(caja, probabilidades)] de los rostros del frame, igual que la ruta local (sid None: sin sesión)."""
+        header = {"op": "predict", "session": sid}
+        slot = self.ring.write(jpeg)
+        if slot is None:
+            self.inline_frames += 1
+            response = await self.request(header, jpeg)
+        else:
+            header.update(ring=self.ring.name, slots=self.ring.slots, slot_bytes=self.ring.slot_bytes,
+                          slot=slot, len=len(jpeg))
+            # El servidor lee el hueco sin copiarlo: se libera cuando responde, no cuando
+            # se cancela la petición (desconexión de la sesión o del cliente HTTP)
+            response = await self.request(header, on_done=lambda: self.ring.release(slot))
+        return [(f["box"], np.asarray(f["probs"], dtype=np.float32)) for f in response["faces"]]
+
+    async def close_session(self, sid: int):
+        if self._writer is None:
+            return
+        async with self._write_lock:
+            self._writer.write(encode_message({"op": "close", "session": sid}))
+            await self._writer.drain()
+
+    async def server_stats(self) -> dict:
+        response = await self.request({"op": "stats"})
+        response.pop("id", None)
+        return response
+
+    async def swap_model(self, version: str = None) -> dict:
+        response = await self.request({"op": "swap", "version": version})
+        response.pop("id", None)
+        return response
+
+    async def server_metrics(self) -> list:
+        return (await self.request({"op": "metrics"}))["families"]
+
+    def stats(self) -> dict:
+        return {
+            "socket": self.socket_path,
+            "connected": self._writer is not None and not self._writer.is_closing(),
+            "pending": sum(len(p) for p in self._pending.values()),
+            "ring_slots": self.ring.slots,
+            "ring_free_slots": self.ring.free_slots,
+            "inline_frames": self.inline_frames,
+        }
+
+    def close(self):
+        if self._read_task is not None:
+            self._read_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+        self.ring.close()
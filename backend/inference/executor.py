@@ -0,0 +1,61 @@
+# backend/inference/executor.py
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import cv2
+
+# ========================
+# ⚙️ Configuración del executor de visión
+# ========================
+VISION_EXECUTOR = os.getenv("VISION_EXECUTOR", "thread")  # thread / process
+VISION_WORKERS = int(os.getenv("VISION_WORKERS", str(min(4, os.cpu_count() or 1))))
+VISION_MAX_INFLIGHT = int(os.getenv("VISION_MAX_INFLIGHT", "32"))
+
+
+def _init_process_worker():
+    # Cada proceso ya es un worker: evitar que OpenCV lance sus propios hilos
+    cv2.setNumThreads(1)
+
+
+class VisionExecutor:
+    """
+    Ejecuta decodificación y detección fuera del event loop de uvicorn.
+    - kind: "thread" o "process" (las funciones deben ser de nivel de módulo)
+    - max_inflight: máximo de frames en proceso a la vez; el resto espera su turno
+    """
+
+    def __init__(self, kind=VISION_EXECUTOR, workers=VISION_WORKERS, max_inflight=VISION_MAX_INFLIGHT):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"VISION_EXECUTOR inválido: {kind}")
+        self.kind = kind
+        self.workers = max(1, int(workers))
+        self.max_inflight = max(1, int(max_inflight))
+        self.inflight = 0
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_process_worker)
+        else:
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="vision")
+
+    async def run(self, fn, *args):
+        if self.kind == "process":
+            # Las vistas sin copia no se pueden serializar hacia otro proceso
+            args = tuple(bytes(a) if isinstance(a, memoryview) else a for a in args)
+        async with self._slots:
+            self.inflight += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+            finally:
+                self.inflight -= 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_inflight": self.max_inflight,
+            "inflight": self.inflight,
+        }
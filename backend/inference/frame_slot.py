@@ -0,0 +1,45 @@
+# backend/inference/frame_slot.py
+import time
+import asyncio
+
+
+class FrameSlot:
+    """
+    Hueco de un solo frame por sesión: el más reciente gana.
+    Si llega un frame nuevo antes de procesar el anterior, el anterior se descarta
+    y se cuenta en `dropped`. Nunca hay más de un frame pendiente por sesión.
+    """
+
+    def __init__(self):
+        self._frame = None
+        self._ready = asyncio.Event()
+        self.received = 0
+        self.dropped = 0
+        self.last_put = None
+
+    def put(self, frame):
+        self.received += 1
+        self.last_put = time.monotonic()
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = frame
+        self._ready.set()
+
+    async def get(self):
+        while self._frame is None:
+            self._ready.clear()
+            await self._ready.wait()
+        frame, self._frame = self._frame, None
+        self._ready.clear()
+        return frame
+
+    @property
+    def pending(self) -> bool:
+        return self._frame is not None
+
+    def idle_seconds(self) -> float:
+        """Segundos desde el último frame recibido (infinito si nunca llegó ninguno)."""
+        return float("inf") if self.last_put is None else time.monotonic() - self.last_put
+
+    def stats(self) -> dict:
+        return {"received": self.received, "dropped": self.dropped, "pending": self.pending}
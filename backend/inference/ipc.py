@@ -0,0 +1,93 @@
+# backend/inference/ipc.py
+import os
+import json
+import struct
+import uuid
+from collections import deque
+from multiprocessing import shared_memory
+
+# ========================
+# 📨 Mensajes entre workers de la API y el servidor de inferencia
+# ========================
+# Cada mensaje: longitud del JSON y del payload (uint32, big-endian) + JSON + payload.
+# El payload solo se usa cuando el frame no cabe en un hueco del anillo.
+MESSAGE_HEADER = struct.Struct("!II")
+
+
+def encode_message(header: dict, payload=b"") -> bytes:
+    body = json.dumps(header, separators=(",", ":")).encode()
+    return MESSAGE_HEADER.pack(len(body), len(payload)) + body + bytes(payload)
+
+
+async def read_message(reader):
+    """Lee un mensaje completo; lanza asyncio.IncompleteReadError si el otro extremo cerró."""
+    body_len, payload_len = MESSAGE_HEADER.unpack(await reader.readexactly(MESSAGE_HEADER.size))
+    header = json.loads(await reader.readexactly(body_len))
+    payload = await reader.readexactly(payload_len) if payload_len else b""
+    return header, payload
+
+
+# ========================
+# 🧱 Anillo de frames en memoria compartida
+# ========================
+def _attach(name):
+    try:
+        # Python 3.13+: quien solo se conecta no debe registrar (ni borrar) el segmento
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class FrameRing:
+    """
+    Huecos de tamaño fijo en un segmento de memoria compartida.
+    - lado del worker (owner): un solo productor, reparte huecos libres y los
+      libera cuando llega la respuesta del servidor
+    - lado del servidor: se conecta por nombre y lee el frame sin copiarlo
+    """
+
+    def __init__(self, shm, slots: int, slot_bytes: int, owner: bool):
+        self._shm = shm
+        self.name = shm.name
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = owner
+        self._free = deque(range(slots)) if owner else deque()
+
+    @classmethod
+    def create(cls, slots: int, slot_bytes: int):
+        name = f"emotia_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        shm = shared_memory.SharedMemory(name=name, create=True, size=slots * slot_bytes)
+        return cls(shm, slots, slot_bytes, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, slots: int, slot_bytes: int):
+        return cls(_attach(name), slots, slot_bytes, owner=False)
+
+    @property
+    def free_slots(self) -> int:
+        return len(self._free)
+
+    def write(self, data):
+        """Copia el frame a un hueco libre y devuelve su índice, o None si no cabe o no hay hueco."""
+        if len(data) > self.slot_bytes or not self._free:
+            return None
+        slot = self._free.popleft()
+        start = slot * self.slot_bytes
+        self._shm.buf[start:start + len(data)] = data
+        return slot
+
+    def release(self, slot: int):
+        self._free.append(slot)
+
+    def view(self, slot: int, length: int) -> memoryview:
+        start = slot * self.slot_bytes
+        return self._shm.buf[start:start + length]
+
+    def close(self):
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
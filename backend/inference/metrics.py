@@ -0,0 +1,146 @@
+# backend/inference/metrics.py
+"""
+Contadores e histogramas del camino de predicción, expuestos en /metrics en el
+formato de texto de Prometheus. Sin dependencias: observar es un bisect y dos
+sumas bajo un lock, nada que se note frente a los milisegundos de cada frame.
+
+La etiqueta `sessions` es el rango de sesiones activas del proceso ("1", "2-4",
+"5-16"...), no el id de sesión: la cardinalidad queda acotada.
+"""
+import bisect
+import threading
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+SESSION_RANGES = (1, 4, 16, 64)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_sessions = 0
+_sessions_label = "0"
+
+
+def _range_label(n: int) -> str:
+    if n <= 0:
+        return "0"
+    lower = 1
+    for upper in SESSION_RANGES:
+        if n <= upper:
+            return str(upper) if lower == upper else f"{lower}-{upper}"
+        lower = upper + 1
+    return f"{lower}+"
+
+
+def set_sessions(n: int):
+    """Lo llama quien abre o cierra sesiones; la etiqueta se calcula una vez aquí."""
+    global _sessions, _sessions_label
+    _sessions = n
+    _sessions_label = _range_label(n)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = (*labels.items(), ("sessions", _sessions_label))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = [[dict(key), value] for key, value in self._values.items()]
+        return {"name": self.name, "type": self.kind, "help": self.help, "samples": samples}
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=STAGE_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._values: dict[tuple, list] = {}  # etiquetas -> [conteo por bucket..., +Inf, suma]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = (*labels.items(), ("sessions", _sessions_label))
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[i] += 1
+            counts[-1] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = [[dict(key), list(counts)] for key, counts in self._values.items()]
+        return {"name": self.name, "type": self.kind, "help": self.help,
+                "buckets": list(self.buckets), "samples": samples}
+
+
+# ========================
+# 📈 Métricas del pipeline
+# ========================
+FRAMES_RECEIVED = Counter("emotia_frames_received_total", "Frames recibidos por WebSocket")
+FRAMES_DROPPED = Counter("emotia_frames_dropped_total", "Frames descartados sin procesar porque llegó uno más nuevo")
+FACES_PREDICTED = Counter("emotia_faces_predicted_total", "Rostros que pasaron por el modelo")
+CASCADE_FACES = Counter(
+    "emotia_cascade_faces_total",
+    "Rostros por etapa de la cascada (light: todos, heavy: los escalados)",
+)
+STAGE_SECONDS = Histogram(
+    "emotia_stage_seconds",
+    "Duración de cada etapa: decode, detect, preprocess, queue_wait, infer, broadcast",
+)
+REGISTRY = [FRAMES_RECEIVED, FRAMES_DROPPED, FACES_PREDICTED, CASCADE_FACES, STAGE_SECONDS]
+
+
+def snapshot() -> list:
+    """Estado de todas las métricas (serializable a JSON, para juntar las del servidor de inferencia)."""
+    families = [metric.snapshot() for metric in REGISTRY]
+    families.append({"name": "emotia_active_sessions", "type": "gauge", "help": "Sesiones activas",
+                     "samples": [[{}, _sessions]]})
+    return families
+
+
+def snapshot_labels(families: list, labels: dict) -> list:
+    """Añade etiquetas fijas a cada muestra (p. ej. process="inference_server")."""
+    for family in families:
+        for sample in family["samples"]:
+            sample[0] = {**sample[0], **labels}
+    return families
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def render(*snapshots) -> str:
+    """Texto de Prometheus; las familias con el mismo nombre de varios procesos se agrupan."""
+    merged: dict[str, dict] = {}
+    for families in snapshots:
+        for family in families:
+            target = merged.setdefault(family["name"], {**family, "samples": []})
+            target["samples"].extend(family["samples"])
+    lines = []
+    for name, family in merged.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for labels, value in family["samples"]:
+            if family["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*family["buckets"], "+Inf"], value[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value[-1]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,104 @@
+# backend/inference/outbox.py
+import os
+import asyncio
+from collections import deque
+
+# ========================
+# 📤 Cola de salida por cliente
+# ========================
+OUTBOX_MAX_MESSAGES = int(os.getenv("WS_OUTBOX_MAX_MESSAGES", "8"))
+# Descartes seguidos sin lograr un envío antes de expulsar al cliente
+OUTBOX_MAX_DROPS = int(os.getenv("WS_OUTBOX_MAX_DROPS", "50"))
+# Un envío que tarda más que esto marca al cliente como lento y lo expulsa
+OUTBOX_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+
+
+class ClientOutbox:
+    """
+    Cola acotada de mensajes para un WebSocket, vaciada por su propia tarea.
+    - put() nunca espera: quien difunde no depende del cliente más lento
+    - cola llena: se descarta el mensaje más antiguo (el nuevo lo reemplaza)
+    - demasiados descartes seguidos o un envío que no termina: se expulsa al
+      cliente y se avisa con on_evict(outbox, motivo)
+    """
+
+    def __init__(self, websocket, on_evict=None, max_messages=OUTBOX_MAX_MESSAGES,
+                 max_drops=OUTBOX_MAX_DROPS, send_timeout=OUTBOX_SEND_TIMEOUT):
+        self.websocket = websocket
+        self.on_evict = on_evict
+        self.max_drops = max_drops
+        self.send_timeout = send_timeout
+        self._queue = deque(maxlen=max_messages)
+        self._ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+        self._drops_in_row = 0
+        self.evicted = None
+        self._task = asyncio.create_task(self._write())
+
+    def put(self, message: str):
+        if self.evicted:
+            return
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+            self._drops_in_row += 1
+            if self._drops_in_row >= self.max_drops:
+                self.evict("no consume los mensajes")
+                return
+        self._queue.append(message)
+        self._ready.set()
+
+    async def _write(self):
+        try:
+            while True:
+                await self._ready.wait()
+                while self._queue:
+                    await asyncio.wait_for(self.websocket.send_text(self._queue.popleft()), self.send_timeout)
+                    self.sent += 1
+                    self._drops_in_row = 0
+                self._ready.clear()
+        except asyncio.TimeoutError:
+            self.evict("envío lento")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.evict("conexión cerrada")
+
+    def evict(self, reason: str):
+        if self.evicted:
+            return
+        self.evicted = reason
+        self._queue.clear()
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+        if self.on_evict is not None:
+            self.on_evict(self, reason)
+
+    def close(self):
+        self.evicted = self.evicted or "cerrado"
+        self._task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._queue),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+        }
+
+
+_closing: set = set()
+
+
+def close_in_background(websocket, code=1013):
+    """Cierra el socket de un cliente expulsado sin que espere quien lo expulsa."""
+    task = asyncio.create_task(_close_quietly(websocket, code))
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+async def _close_quietly(websocket, code):
+    try:
+        await asyncio.wait_for(websocket.close(code=code), OUTBOX_SEND_TIMEOUT)
+    except Exception:
+        pass
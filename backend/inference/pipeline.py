@@ -0,0 +1,194 @@
+# backend/inference/pipeline.py
+import os
+import time
+import threading
+
+import numpy as np
+import cv2
+
+from backend.inference.tracking import TRACK_MARGIN, TRACK_SEARCH_SCALE, TRACK_MAX_DIFF
+from ia.preprocessing import PreprocessSpec, prepare_batch
+
+# ========================
+# 👤 Detector de rostros (uno por hilo)
+# ========================
+# cv2.CascadeClassifier no es thread-safe: cada hilo del executor usa su propia instancia
+CASCADE_PATH = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+SIGNATURE_SIZE = (16, 16)
+# Lado máximo de la imagen sobre la que corre el detector (0 = resolución completa)
+DETECT_MAX_SIDE = int(os.getenv("FACE_DETECT_MAX_SIDE", "320"))
+# Máximo de rostros por frame (1 = solo el rostro principal)
+MAX_FACES = int(os.getenv("PREDICT_MAX_FACES", "1"))
+# Entrada de la CNN original; runtime pasa la del modelo activo
+DEFAULT_SPEC = PreprocessSpec()
+_local = threading.local()
+
+
+def get_face_cascade():
+    cascade = getattr(_local, "face_cascade", None)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(CASCADE_PATH)
+        _local.face_cascade = cascade
+    return cascade
+
+
+def detect_faces(gray, min_size=(30, 30), max_size=None, scale_factor=1.1):
+    return get_face_cascade().detectMultiScale(
+        gray, scaleFactor=scale_factor, minNeighbors=5, minSize=min_size, maxSize=max_size or (0, 0)
+    )
+
+
+# ========================
+# 📉 Detección sobre imagen reducida
+# ========================
+def _shrink(image, max_side):
+    # Se reduce la imagen ya decodificada: volver a decodificar el JPEG con
+    # IMREAD_REDUCED_* cuesta más que este resize, porque la resolución completa
+    # hace falta igualmente para recortar los rostros
+    side = max(image.shape[:2])
+    if not max_side or side <= max_side:
+        return image
+    ratio = max_side / side
+    size = (max(1, round(image.shape[1] * ratio)), max(1, round(image.shape[0] * ratio)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def _detect_mapped(small, full_shape, offset=(0, 0), min_size=(30, 30), max_size=None, scale_factor=1.1):
+    """Detecta en `small` y devuelve las cajas en coordenadas de la imagen completa."""
+    sx = full_shape[1] / small.shape[1]
+    sy = full_shape[0] / small.shape[0]
+    if sx != 1.0 or sy != 1.0:
+        s = max(sx, sy)
+        min_size = (max(20, int(min_size[0] / s)), max(20, int(min_size[1] / s)))
+        max_size = (int(max_size[0] / s), int(max_size[1] / s)) if max_size else None
+    faces = detect_faces(small, min_size=min_size, max_size=max_size, scale_factor=scale_factor)
+    ox, oy = offset
+    return [
+        (int(x * sx) + ox, int(y * sy) + oy, int(w * sx), int(h * sy))
+        for x, y, w, h in faces
+    ]
+
+
+# ========================
+# 🎯 Seguimiento: reutilizar o buscar cerca de la caja anterior
+# ========================
+def _clip_box(x, y, w, h, shape):
+    h_img, w_img = shape[:2]
+    x0, y0 = max(0, int(x)), max(0, int(y))
+    x1, y1 = min(w_img, int(x + w)), min(h_img, int(y + h))
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def _expand_box(box, factor, shape):
+    x, y, w, h = box
+    dw, dh = w * (factor - 1) / 2, h * (factor - 1) / 2
+    return _clip_box(x - dw, y - dh, w + 2 * dw, h + 2 * dh, shape)
+
+
+def face_signature(gray, box):
+    x, y, w, h = box
+    return cv2.resize(gray[y:y + h, x:x + w], SIGNATURE_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def _track_faces(gray, hint, max_side=DETECT_MAX_SIDE):
+    """Devuelve (cajas, método) usando la pista del tracker, o ([], None) si hay que detectar todo."""
+    boxes = [_clip_box(*box, gray.shape) for box in hint["boxes"]]
+    if not boxes or any(box is None for box in boxes):
+        return [], None
+
+    # 1) Reutilizar las cajas si el contenido de todas apenas cambió
+    if hint["reuse"] and all(sig is not None for sig in hint["signatures"]):
+        diffs = [
+            float(cv2.absdiff(face_signature(gray, box), sig).mean())
+            for box, sig in zip(boxes, hint["signatures"])
+        ]
+        if max(diffs) <= TRACK_MAX_DIFF:
+            reused = [_expand_box(box, 1 + TRACK_MARGIN, gray.shape) for box in boxes]
+            if all(box is not None for box in reused):
+                return reused, "reuse"
+
+    # 2) Con un solo rostro: detección solo en una zona alrededor de la caja anterior
+    if len(boxes) != 1:
+        return [], None
+    box = boxes[0]
+    region = _expand_box(box, TRACK_SEARCH_SCALE, gray.shape)
+    if region is not None:
+        rx, ry, rw, rh = region
+        # La zona es pequeña y la escala acotada: se puede usar un paso de pirámide más fino
+        side = min(box[2], box[3])
+        min_face, max_face = max(30, int(side * 0.6)), int(side * 1.5)
+        crop = gray[ry:ry + rh, rx:rx + rw]
+        faces = _detect_mapped(
+            _shrink(crop, max_side), crop.shape, offset=(rx, ry),
+            min_size=(min_face, min_face), max_size=(max_face, max_face), scale_factor=1.05,
+        )
+        if faces:
+            return faces[:1], "local"
+    return [], None
+
+
+# ========================
+# 🖼️ Frame → ROIs
+# ========================
+def extract_faces(frame_bytes: bytes, track=None, spec: PreprocessSpec = DEFAULT_SPEC,
+                  max_side=DETECT_MAX_SIDE, max_faces=MAX_FACES):
+    """
+    Decodifica el frame, localiza hasta `max_faces` rostros y devuelve (rois, estado).
+    - rois: array (N, *spec.input_shape) listo para un solo forward pass, o None si el
+      frame no se pudo decodificar; sin rostros, N=1 con el recorte central
+    - spec: forma, color y normalización del modelo (ia/preprocessing.py); los recortes
+      salen en gris y un modelo RGB los recibe repetidos en los 3 canales
+    - estado: cajas (de mayor a menor), firmas y método usado, para el FaceTracker
+    - max_side: la detección corre sobre una imagen de ese lado como máximo; las ROIs
+      se recortan siempre de la resolución completa
+    - estado["timings"]: segundos de decode, detect (incluye el seguimiento) y preprocess
+    """
+    rois, state = extract_faces_multi(frame_bytes, track, (spec,), max_side, max_faces)
+    return (None if rois is None else rois[0]), state
+
+
+def extract_faces_multi(frame_bytes: bytes, track=None, specs=(DEFAULT_SPEC,),
+                        max_side=DETECT_MAX_SIDE, max_faces=MAX_FACES):
+    """
+    Como extract_faces, pero con una lista de ROIs por cada spec. estado["crops"] guarda
+    los recortes en gris (vistas del frame) para preparar otra spec después solo para
+    algunos rostros (los que la cascada pasa al modelo pesado).
+    """
+    start = time.perf_counter()
+    arr = np.frombuffer(frame_bytes, dtype=np.uint8)
+    gray = cv2.imdecode(arr, cv2.IMREAD_GRAYSCALE)
+    decoded = time.perf_counter()
+    if gray is None:
+        return None, {"boxes": [], "signatures": [], "method": "none", "crops": [],
+                      "timings": {"decode": decoded - start}}
+
+    boxes, method = _track_faces(gray, track, max_side) if track else ([], None)
+    if not boxes:
+        faces = _detect_mapped(_shrink(gray, max_side), gray.shape)
+        if faces:
+            # Los rostros más grandes primero: el tope descarta los del fondo
+            boxes = sorted(faces, key=lambda b: b[2] * b[3], reverse=True)[:max(1, max_faces)]
+            method = "full"
+
+    if boxes:
+        crops = [gray[y:y + h, x:x + w] for x, y, w, h in boxes]
+        signatures = [face_signature(gray, box) for box in boxes] if method != "reuse" else []
+    else:
+        h_img, w_img = gray.shape
+        m = min(h_img, w_img)
+        sx = w_img // 2 - m // 2
+        sy = h_img // 2 - m // 2
+        crops = [gray[sy:sy + m, sx:sx + m]]
+        method, signatures = "none", []
+    detected = time.perf_counter()
+    rois = [prepare_batch(crops, spec) for spec in specs]
+    timings = {"decode": decoded - start, "detect": detected - decoded, "preprocess": time.perf_counter() - detected}
+    return rois, {"boxes": boxes, "signatures": signatures, "method": method, "crops": crops, "timings": timings}
+
+
+def extract_roi(frame_bytes: bytes, spec: PreprocessSpec = DEFAULT_SPEC):
+    """Decodifica el frame, detecta el rostro y devuelve la ROI lista para el modelo."""
+    rois, _ = extract_faces(frame_bytes, spec=spec, max_faces=1)
+    return None if rois is None else rois[0]
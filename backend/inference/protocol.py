@@ -0,0 +1,46 @@
+# backend/inference/protocol.py
+import json
+import base64
+import struct
+
+# ========================
+# 📦 Protocolo de frames para /ws/predict
+# ========================
+# Modo binario: cabecera fija de 8 bytes + JPEG crudo
+#   magic "EM" (2s) | versión (B) | tipo (B) | seq (uint32, big-endian)
+# Modo JSON (clientes antiguos): {"type": "frame", "data": "data:image/jpeg;base64,..."}
+FRAME_HEADER = struct.Struct("!2sBBI")
+FRAME_MAGIC = b"EM"
+FRAME_VERSION = 1
+FRAME_TYPE_JPEG = 1
+
+
+def pack_binary_frame(jpeg: bytes, seq: int = 0) -> bytes:
+    return FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, FRAME_TYPE_JPEG, seq & 0xFFFFFFFF) + jpeg
+
+
+def parse_binary_frame(data: bytes):
+    """Devuelve (seq, jpeg) donde jpeg es una vista sin copia sobre el buffer recibido."""
+    if len(data) <= FRAME_HEADER.size:
+        raise ValueError("Frame binario demasiado corto")
+    magic, version, frame_type, seq = FRAME_HEADER.unpack_from(data)
+    if magic != FRAME_MAGIC or version != FRAME_VERSION:
+        raise ValueError("Cabecera de frame desconocida")
+    if frame_type != FRAME_TYPE_JPEG:
+        raise ValueError(f"Tipo de frame no soportado: {frame_type}")
+    return seq, memoryview(data)[FRAME_HEADER.size:]
+
+
+def parse_text_frame(text: str):
+    """Devuelve (seq, data_url) de un mensaje JSON, o None si no es un frame."""
+    data = json.loads(text)
+    if data.get("type") != "frame" or not data.get("data"):
+        return None
+    return data.get("seq"), data["data"]
+
+
+def frame_to_jpeg(frame):
+    """Bytes JPEG a partir de lo que guardó el receptor: data URL (JSON) o vista binaria."""
+    if isinstance(frame, str):
+        return base64.b64decode(frame.split(",")[-1])
+    return frame
@@ -0,0 +1,171 @@
+# backend/inference/registry.py
+"""
+Registro de versiones del modelo: un directorio por versión con los mismos
+archivos que deja ia/train_images.py en ia/models/
+
+    ia/models/registry/
+        CURRENT                     <- nombre de la versión activa
+        2025-06-01_1530/
+            best_model.keras
+            best_model.meta.json
+            class_indices.json
+            best_model_fp16.tflite  (opcional, ia/export_tflite.py)
+            best_model_int8.tflite  (opcional)
+
+Sin registro (o sin CURRENT) se sirve ia/models/ tal cual, como versión "base".
+
+Uso: python -m backend.inference.registry list
+     python -m backend.inference.registry publish [--name v2] [--source ia/models/student] [--activate]
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+from pathlib import Path
+
+from ia.preprocessing import PreprocessSpec, metadata_path
+
+ROOT = Path(__file__).resolve().parents[2]
+MODELS_DIR = ROOT / "ia" / "models"
+MODEL_REGISTRY_DIR = Path(os.getenv("MODEL_REGISTRY_DIR", str(MODELS_DIR / "registry")))
+CURRENT_FILE = "CURRENT"
+BASE_VERSION = "base"
+MODEL_FILE = "best_model.keras"
+TFLITE_FILES = {
+    "tflite_fp16": "best_model_fp16.tflite",
+    "tflite_int8": "best_model_int8.tflite",
+}
+DEFAULT_CLASS_NAMES = ['angry', 'disgust', 'fear', 'happy', 'neutral', 'sad', 'surprise']
+
+
+class ModelVersion:
+    """Los archivos de una versión: modelo, metadatos de preprocesado y clases."""
+
+    def __init__(self, name: str, directory: Path):
+        self.name = name
+        self.directory = Path(directory)
+
+    @property
+    def model_path(self) -> Path:
+        return self.directory / MODEL_FILE
+
+    @property
+    def class_indices_path(self) -> Path:
+        return self.directory / "class_indices.json"
+
+    def tflite_path(self, backend: str) -> Path:
+        return self.directory / TFLITE_FILES[backend]
+
+    def artifact_path(self, backend: str) -> Path:
+        return self.model_path if backend == "keras" else self.tflite_path(backend)
+
+    def spec(self) -> PreprocessSpec:
+        return PreprocessSpec.load(self.model_path)
+
+    def class_names(self) -> list:
+        if not self.class_indices_path.exists():
+            return list(DEFAULT_CLASS_NAMES)
+        with open(self.class_indices_path, "r", encoding="utf-8") as f:
+            class_indices = json.load(f)
+        return [class_indices[str(i)] for i in range(len(class_indices))]
+
+    def describe(self) -> dict:
+        files = [MODEL_FILE, metadata_path(MODEL_FILE).name, "class_indices.json", *TFLITE_FILES.values()]
+        return {
+            "name": self.name,
+            "path": str(self.directory),
+            "files": [f for f in files if (self.directory / f).exists()],
+            "modified": max(
+                ((self.directory / f).stat().st_mtime for f in files if (self.directory / f).exists()),
+                default=None,
+            ),
+        }
+
+
+def base_version() -> ModelVersion:
+    return ModelVersion(BASE_VERSION, MODELS_DIR)
+
+
+def list_versions() -> list:
+    versions = [base_version()]
+    if MODEL_REGISTRY_DIR.is_dir():
+        versions += [
+            ModelVersion(d.name, d) for d in sorted(MODEL_REGISTRY_DIR.iterdir())
+            if d.is_dir() and not d.name.startswith(".")
+        ]
+    return versions
+
+
+def get_version(name: str) -> ModelVersion:
+    if name == BASE_VERSION:
+        return base_version()
+    directory = MODEL_REGISTRY_DIR / name
+    # El nombre viene de la API: nada de rutas fuera del registro
+    if name.startswith(".") or directory.parent != MODEL_REGISTRY_DIR or not directory.is_dir():
+        raise FileNotFoundError(f"❌ Versión de modelo no encontrada: {name}")
+    return ModelVersion(name, directory)
+
+
+def active_name() -> str:
+    path = MODEL_REGISTRY_DIR / CURRENT_FILE
+    if not path.exists():
+        return BASE_VERSION
+    return path.read_text(encoding="utf-8").strip() or BASE_VERSION
+
+
+def active_version() -> ModelVersion:
+    return get_version(active_name())
+
+
+def set_active(name: str):
+    """Marca la versión activa (escritura atómica: los procesos que vigilan nunca leen a medias)."""
+    get_version(name)
+    MODEL_REGISTRY_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = MODEL_REGISTRY_DIR / (CURRENT_FILE + ".tmp")
+    tmp.write_text(name + "\n", encoding="utf-8")
+    os.replace(tmp, MODEL_REGISTRY_DIR / CURRENT_FILE)
+
+
+def publish(name: str = None, source: Path = MODELS_DIR) -> ModelVersion:
+    """Copia el modelo entrenado en `source` (ia/models/) como una versión nueva del registro."""
+    name = name or time.strftime("%Y-%m-%d_%H%M%S")
+    if not (Path(source) / MODEL_FILE).exists():
+        raise FileNotFoundError(f"❌ No hay {MODEL_FILE} en {source}")
+    target = MODEL_REGISTRY_DIR / name
+    if target.exists():
+        raise FileExistsError(f"❌ La versión {name} ya existe")
+    # Se copia a un directorio oculto y se renombra: una versión nunca aparece a medias
+    staging = MODEL_REGISTRY_DIR / f".{name}.tmp"
+    staging.mkdir(parents=True)
+    for f in (MODEL_FILE, metadata_path(MODEL_FILE).name, "class_indices.json", *TFLITE_FILES.values()):
+        if (Path(source) / f).exists():
+            shutil.copy2(Path(source) / f, staging / f)
+    os.replace(staging, target)
+    return ModelVersion(name, target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro de versiones del modelo")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    pub = sub.add_parser("publish", help="copiar ia/models/ como versión nueva")
+    pub.add_argument("--name")
+    pub.add_argument("--source", type=Path, default=MODELS_DIR, help="directorio con best_model.keras")
+    pub.add_argument("--activate", action="store_true", help="marcarla como activa (CURRENT)")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        current = active_name()
+        for v in list_versions():
+            print(("* " if v.name == current else "  ") + v.name, ", ".join(v.describe()["files"]))
+    else:
+        version = publish(args.name, args.source)
+        print("✅ Versión publicada:", version.directory)
+        if args.activate:
+            set_active(version.name)
+            print("✅ Versión activa:", version.name)
+
+
+if __name__ == "__main__":
+    main()
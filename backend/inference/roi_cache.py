@@ -0,0 +1,88 @@
+# backend/inference/roi_cache.py
+import os
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# ========================
+# 🗂️ Caché de predicciones por huella del ROI
+# ========================
+ROI_CACHE_ENABLED = os.getenv("ROI_CACHE_ENABLED", "1") == "1"
+# Entradas por sesión: acota la memoria (cada una guarda la huella y un vector de probabilidades)
+ROI_CACHE_SIZE = int(os.getenv("ROI_CACHE_SIZE", "32"))
+# Bits distintos (de HASH_SIZE² = 256) que aún cuentan como el mismo rostro:
+# ~10 entre frames seguidos de una cámara quieta, >100 entre rostros distintos
+ROI_CACHE_MAX_DISTANCE = int(os.getenv("ROI_CACHE_MAX_DISTANCE", "12"))
+ROI_CACHE_HASH_SIZE = int(os.getenv("ROI_CACHE_HASH_SIZE", "16"))
+
+
+def roi_fingerprint(roi: np.ndarray, hash_size: int = ROI_CACHE_HASH_SIZE) -> int:
+    """dHash: gradiente horizontal del ROI reducido a (hash_size+1) x hash_size, un bit por par de píxeles."""
+    img = np.asarray(roi, dtype=np.float32)
+    if img.ndim == 3:
+        # (H, W, C): la huella se calcula sobre el promedio de canales
+        img = img.mean(axis=-1)
+    small = cv2.resize(img, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class ROICache:
+    """
+    LRU pequeño por sesión: huella del ROI -> probabilidades.
+    Acierta si alguna huella guardada está a distancia de Hamming <= max_distance.
+    """
+
+    def __init__(self, max_entries=ROI_CACHE_SIZE, max_distance=ROI_CACHE_MAX_DISTANCE,
+                 hash_size=ROI_CACHE_HASH_SIZE):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.hash_size = hash_size
+        self._entries: OrderedDict[int, np.ndarray] = OrderedDict()
+        # Versión del modelo que predijo lo guardado (la fija runtime)
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, roi: np.ndarray) -> int:
+        return roi_fingerprint(roi, self.hash_size)
+
+    def get(self, fp: int):
+        best, best_distance = None, self.max_distance + 1
+        for key in self._entries:
+            distance = (key ^ fp).bit_count()
+            if distance < best_distance:
+                best, best_distance = key, distance
+                if distance == 0:
+                    break
+        if best is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(best)
+        return self._entries[best]
+
+    def put(self, fp: int, probs: np.ndarray):
+        self._entries[fp] = probs
+        self._entries.move_to_end(fp)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "bytes": sum(p.nbytes + self.hash_size ** 2 // 8 for p in self._entries.values()),
+        }
+
+
+def new_cache():
+    """Caché para una sesión nueva, o None si está desactivada en este despliegue."""
+    return ROICache() if ROI_CACHE_ENABLED and ROI_CACHE_SIZE > 0 else None
@@ -0,0 +1,402 @@
+# backend/inference/runtime.py
+import os
+import gc
+import asyncio
+import time
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from backend.inference import registry
+from backend.inference.batcher import BatchScheduler
+from backend.inference.cascade import CASCADE_LIGHT_VERSION, CascadeStats, escalation_mask
+from backend.inference.executor import VisionExecutor
+from backend.inference.metrics import STAGE_SECONDS, CASCADE_FACES
+from backend.inference.pipeline import extract_faces_multi, extract_roi
+from backend.inference.protocol import frame_to_jpeg
+from backend.inference.tracking import FaceTracker
+from ia.preprocessing import PreprocessSpec, metadata_path, prepare_batch
+
+# ========================
+# 🧠 Modelo y backend de inferencia
+# ========================
+# TensorFlow solo se importa al cargar el modelo (load_predictor), nunca al importar este módulo
+ROOT = Path(__file__).resolve().parents[2]
+# keras / tflite_fp16 / tflite_int8 (los .tflite se generan con ia/export_tflite.py)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "keras")
+# Ruta del socket del servidor de inferencia compartido (backend/inference/server.py).
+# Vacío: este proceso carga su propio modelo (modo local, un solo worker)
+INFERENCE_SERVER = os.getenv("INFERENCE_SERVER", "")
+# Cada cuántos segundos se mira si cambió la versión activa del registro (0: solo por la API)
+MODEL_WATCH_SECONDS = float(os.getenv("MODEL_WATCH_SECONDS", "0"))
+# Espera máxima a que terminen los frames que empezaron con el modelo anterior
+MODEL_RETIRE_TIMEOUT = float(os.getenv("MODEL_RETIRE_TIMEOUT", "30"))
+
+# Versión que se cargará (la activa del registro, o ia/models/ si no hay registro).
+# Un CURRENT roto no tumba la API al importar: load_predictor() vuelve a resolverlo y deja el error en status
+try:
+    version = registry.active_version()
+except FileNotFoundError as e:
+    print(f"⚠️ {e}; se usa la versión base hasta cargar el modelo")
+    version = registry.base_version()
+MODEL_PATH = version.model_path
+CLASS_NAMES = version.class_names()
+# Forma, color y normalización del modelo (best_model.meta.json, lo escribe ia/train_images.py)
+preprocess_spec = version.spec()
+predictor = None
+status = {"state": "idle", "load_seconds": None, "error": None}
+_load_lock = threading.Lock()
+
+
+class ServingModel:
+    """
+    Una versión cargada y calentada: predictor, preprocesado, clases y su propio
+    planificador de lotes. Los lotes ya encolados terminan con la versión con la
+    que empezaron aunque entre otra mientras tanto.
+    """
+
+    def __init__(self, version, predictor, spec, class_names, load_seconds, light=None):
+        self.version = version
+        self.predictor = predictor
+        self.spec = spec
+        self.class_names = class_names
+        self.load_seconds = load_seconds
+        self.scheduler = BatchScheduler(predictor)
+        self.scheduler.max_batch_size = min(self.scheduler.max_batch_size, predictor.max_batch)
+        # Con cascada: el modelo ligero que ve todos los rostros antes que este
+        self.light = light
+        self.cascade = CascadeStats() if light is not None else None
+        self.in_use = 0
+
+    @property
+    def specs(self):
+        """Preprocesado de todos los rostros del frame: el del ligero si hay cascada, si no el propio."""
+        return (self.light.spec,) if self.light is not None else (self.spec,)
+
+    async def infer(self, rois: list, crops=None) -> list:
+        """
+        ROIs preparados con specs -> probabilidades por rostro. Con cascada, los recortes
+        (estado["crops"] de la pipeline) de los rostros dudosos se preparan aquí con la
+        spec del pesado: el resto nunca pasa por su preprocesado.
+        """
+        if self.light is None:
+            return await self.scheduler.submit_many(list(rois[0]))
+        preds = await self.light.scheduler.submit_many(list(rois[0]))
+        unsure = np.flatnonzero(escalation_mask(preds, self.cascade.min_confidence, self.cascade.min_margin))
+        self.cascade.record(len(preds), len(unsure))
+        CASCADE_FACES.inc(len(preds), model="light")
+        if len(unsure):
+            CASCADE_FACES.inc(len(unsure), model="heavy")
+            heavy = await self.scheduler.submit_many(list(prepare_batch([crops[i] for i in unsure], self.spec)))
+            for i, p in zip(unsure, heavy):
+                preds[i] = p
+        return preds
+
+    def close(self):
+        self.scheduler.shutdown()
+        self.predictor = None
+        if self.light is not None:
+            self.light.close()
+
+
+def _build_predictor(version):
+    from backend.inference.serving import CompiledPredictor, TFLitePredictor
+
+    path = version.artifact_path(INFERENCE_BACKEND) if INFERENCE_BACKEND in ("keras", *registry.TFLITE_FILES) else None
+    if path is None:
+        raise ValueError(f"INFERENCE_BACKEND inválido: {INFERENCE_BACKEND}")
+    if not path.exists():
+        raise FileNotFoundError(f"❌ Modelo no encontrado en: {path}")
+    if INFERENCE_BACKEND == "keras":
+        from tensorflow.keras.models import load_model
+        # Funciones de forma fija por bucket, trazadas y calentadas antes de aceptar frames
+        return CompiledPredictor(load_model(str(path), compile=False))
+    return TFLitePredictor(path, backend=INFERENCE_BACKEND)
+
+
+def _check_spec(version, spec, input_shape):
+    """La entrada del modelo cargado manda: sin metadatos se deduce de ella, con metadatos deben coincidir."""
+    input_shape = tuple(int(v) for v in input_shape)
+    if input_shape == spec.input_shape:
+        return spec
+    if metadata_path(version.model_path).exists():
+        raise ValueError(
+            f"❌ {metadata_path(version.model_path).name} indica {spec.input_shape} "
+            f"pero el modelo espera {input_shape}"
+        )
+    return PreprocessSpec(input_shape)
+
+
+def _load_version(version, light_version: str = CASCADE_LIGHT_VERSION) -> ServingModel:
+    """Carga y calienta una versión, y el modelo ligero de la cascada si hay uno (bloqueante: en un hilo)."""
+    start = time.perf_counter()
+    light = None
+    if light_version and light_version != version.name:
+        light = _load_version(registry.get_version(light_version), light_version="")
+        if light.class_names != version.class_names():
+            light.close()
+            raise ValueError(f"El modelo ligero {light_version} tiene otras clases que {version.name}")
+    p = _build_predictor(version)
+    spec = _check_spec(version, version.spec(), p.input_shape)
+    p.warmup()
+    return ServingModel(version, p, spec, version.class_names(), round(time.perf_counter() - start, 2), light)
+
+
+current: ServingModel | None = None
+
+
+def _activate(model: ServingModel):
+    global current, predictor, preprocess_spec, CLASS_NAMES, MODEL_PATH, version
+    # Una sola asignación decide qué modelo usan los frames nuevos; el resto es para stats y scripts
+    current = model
+    version, MODEL_PATH = model.version, model.version.model_path
+    predictor, preprocess_spec, CLASS_NAMES = model.predictor, model.spec, model.class_names
+
+
+def load_predictor():
+    """Carga TensorFlow y el modelo la primera vez que se llama; después devuelve el mismo."""
+    if current is not None:
+        return current.predictor
+    with _load_lock:
+        if current is None:
+            status["state"] = "loading"
+            try:
+                # La activa en este momento (CURRENT pudo cambiar desde el arranque)
+                model = _load_version(registry.active_version())
+            except Exception as e:
+                status.update(state="error", error=str(e))
+                raise
+            _activate(model)
+            status.update(state="ready", load_seconds=model.load_seconds, error=None)
+    return current.predictor
+
+
+async def _serving_model() -> ServingModel:
+    if current is None:
+        # El preprocesado depende de la entrada del modelo: se carga antes del primer frame
+        await asyncio.to_thread(load_predictor)
+    return current
+
+
+# ========================
+# 🔄 Cambio de versión en caliente
+# ========================
+_swap_lock: asyncio.Lock | None = None
+_retiring: set = set()
+
+
+async def swap_model(name: str = None) -> dict:
+    """
+    Carga `name` (por defecto la activa del registro) en segundo plano, la calienta y
+    la pone en servicio. Las sesiones no se cortan: los frames en curso terminan con
+    la versión anterior, que se libera después.
+    """
+    global _swap_lock
+    if INFERENCE_SERVER:
+        # El modelo vive en el servidor de inferencia: el cambio se hace allí
+        return await get_client().swap_model(name)
+    if _swap_lock is None:
+        _swap_lock = asyncio.Lock()
+    async with _swap_lock:
+        target = registry.get_version(name or registry.active_name())
+        old = await _serving_model()
+        if target.name == old.version.name:
+            return {"version": target.name, "swapped": False}
+        status["state"] = "swapping"
+        try:
+            model = await asyncio.to_thread(_load_version, target)
+        except Exception as e:
+            status["state"] = "ready"
+            raise RuntimeError(f"No se pudo cargar la versión {target.name}: {e}") from e
+        if model.class_names != old.class_names:
+            # Suavizado y cachés de las sesiones asumen las mismas clases: eso requiere reiniciar
+            model.close()
+            status["state"] = "ready"
+            raise ValueError(f"La versión {target.name} tiene otras clases ({model.class_names})")
+        _activate(model)
+        status.update(state="ready", load_seconds=model.load_seconds, error=None)
+        task = asyncio.create_task(_retire(old))
+        _retiring.add(task)
+        task.add_done_callback(_retiring.discard)
+        print(f"🔄 Modelo {old.version.name} -> {model.version.name} ({model.load_seconds}s de carga)")
+        return {"version": model.version.name, "previous": old.version.name, "swapped": True,
+                "load_seconds": model.load_seconds}
+
+
+async def _retire(model: ServingModel):
+    deadline = time.monotonic() + MODEL_RETIRE_TIMEOUT
+    while model.in_use and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    model.close()
+    del model
+    # Los pesos de TensorFlow se liberan en cuanto no queda ninguna referencia
+    gc.collect()
+
+
+async def serving_version() -> str:
+    """Versión que atiende los frames (la del servidor de inferencia en modo remoto)."""
+    if INFERENCE_SERVER:
+        return (await get_client().server_stats())["serving"]["version"]
+    return current.version.name if current is not None else None
+
+
+async def watch_registry(interval: float = MODEL_WATCH_SECONDS):
+    """Cambia de versión cuando CURRENT apunta a otra (p. ej. tras `registry publish --activate`)."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if current is not None and registry.active_name() != current.version.name:
+                await swap_model()
+        except Exception as e:
+            print(f"❌ No se pudo cambiar de modelo: {e}")
+
+
+_watch_task: asyncio.Task | None = None
+
+
+def start_model_watch():
+    """Con MODEL_WATCH_SECONDS > 0, vigila el registro desde el event loop actual."""
+    global _watch_task
+    if INFERENCE_SERVER or MODEL_WATCH_SECONDS <= 0 or _watch_task is not None:
+        return
+    _watch_task = asyncio.get_running_loop().create_task(watch_registry())
+
+
+def warm_up_in_background():
+    """Carga el modelo en un hilo aparte: la API responde mientras TensorFlow arranca."""
+    if INFERENCE_SERVER:
+        # El modelo vive en el servidor de inferencia, no en este worker
+        return
+
+    def run():
+        try:
+            load_predictor()
+            print(f"🧠 Modelo listo ({INFERENCE_BACKEND}, versión {version.name}) en {status['load_seconds']}s")
+        except Exception as e:
+            print(f"❌ No se pudo cargar el modelo: {e}")
+
+    threading.Thread(target=run, name="model-warmup", daemon=True).start()
+
+
+def predict_batch(rois: np.ndarray) -> np.ndarray:
+    return load_predictor()(rois)
+
+
+def decode_prediction(preds: np.ndarray):
+    idx = int(np.argmax(preds))
+    return {"emotion": CLASS_NAMES[idx], "confidence": float(preds[idx])}
+
+
+def predict_from_bytes(frame_bytes: bytes):
+    roi = extract_roi(frame_bytes, preprocess_spec)
+    if roi is None:
+        return None
+    return decode_prediction(predict_batch(np.expand_dims(roi, 0))[0])
+
+
+# Decodificación y detección fuera del event loop
+vision_executor = VisionExecutor()
+client = None
+
+
+def get_client():
+    global client
+    if client is None:
+        from backend.inference.client import InferenceClient
+        client = InferenceClient(INFERENCE_SERVER)
+    return client
+
+
+async def predict_frame_local(jpeg, tracker, cache=None):
+    """Detección + lote en este proceso. Devuelve [(caja, probabilidades)] por rostro (ValueError si no decodifica)."""
+    model = await _serving_model()
+    # El frame entero usa la versión con la que empezó, aunque haya un cambio a mitad
+    model.in_use += 1
+    try:
+        return await _predict_with(model, jpeg, tracker, cache)
+    finally:
+        model.in_use -= 1
+
+
+async def _predict_with(model: ServingModel, jpeg, tracker, cache):
+    rois, faces = await vision_executor.run(extract_faces_multi, jpeg, tracker.hint(), model.specs)
+    for stage, seconds in faces["timings"].items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+    tracker.update(faces)
+    if rois is None:
+        raise ValueError("Imagen inválida: no se pudo decodificar")
+    boxes = faces["boxes"] or [None]
+    if cache is None:
+        # Todos los rostros del frame entran juntos en el mismo lote
+        return list(zip(boxes, await model.infer(rois, faces["crops"])))
+    if cache.generation != model.version.name:
+        # Lo guardado lo predijo otra versión del modelo
+        cache.clear()
+        cache.generation = model.version.name
+    # ROIs casi idénticos a uno ya visto en la sesión no pasan por el modelo
+    fingerprints = [cache.fingerprint(roi) for roi in rois[0]]
+    preds = [cache.get(fp) for fp in fingerprints]
+    missing = [i for i, p in enumerate(preds) if p is None]
+    if missing:
+        fresh = await model.infer([r[missing] for r in rois], [faces["crops"][i] for i in missing])
+        for i, p in zip(missing, fresh):
+            preds[i] = p
+            cache.put(fingerprints[i], p)
+    return list(zip(boxes, preds))
+
+
+async def predict_frame(sid: int, frame, tracker, cache=None):
+    """Frame de una sesión -> [(caja, probabilidades)], en el servidor compartido si está configurado."""
+    jpeg = frame_to_jpeg(frame)
+    if INFERENCE_SERVER:
+        # El tracker y la caché de la sesión viven en el servidor
+        return await get_client().predict_frame(sid, jpeg)
+    return await predict_frame_local(jpeg, tracker, cache)
+
+
+async def predict_image(image: bytes):
+    """Imagen suelta (sin sesión, p. ej. /predict): sin seguimiento ni caché entre imágenes."""
+    if INFERENCE_SERVER:
+        return await get_client().predict_frame(None, image)
+    return await predict_frame_local(image, FaceTracker())
+
+
+async def end_session(sid: int):
+    if client is not None:
+        try:
+            await client.close_session(sid)
+        except Exception:
+            pass
+
+
+def shutdown():
+    if _watch_task is not None:
+        _watch_task.cancel()
+    if current is not None:
+        current.close()
+    vision_executor.shutdown()
+    if client is not None:
+        client.close()
+
+
+def stats() -> dict:
+    if INFERENCE_SERVER:
+        return {"mode": "remote", "client": client.stats() if client is not None else None}
+    serving = {"backend": INFERENCE_BACKEND, "version": version.name, **status,
+               "preprocessing": preprocess_spec.to_dict(), "retiring": len(_retiring)}
+    if predictor is not None:
+        serving.update(input_shape=list(predictor.input_shape), buckets=predictor.buckets)
+    if current is not None and current.light is not None:
+        serving["cascade"] = {
+            "light_version": current.light.version.name,
+            "light_input_shape": list(current.light.spec.input_shape),
+            "light_batching": current.light.scheduler.stats(),
+            **current.cascade.stats(),
+        }
+    return {
+        "mode": "local",
+        "batching": current.scheduler.stats() if current is not None else None,
+        "serving": serving,
+        "executor": vision_executor.stats(),
+    }
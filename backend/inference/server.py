@@ -0,0 +1,160 @@
+# backend/inference/server.py
+"""
+Servidor de inferencia compartido: un solo proceso por nodo con el modelo,
+el detector y el planificador de lotes. Los workers de la API le pasan los
+frames por memoria compartida (FrameRing) y reciben el resultado por un
+socket Unix, así que hay una sola copia del modelo y los lotes mezclan
+frames de todos los workers.
+
+Uso: python -m backend.inference.server   (o python -m backend.serve para todo junto)
+"""
+import os
+import time
+import asyncio
+
+from backend.inference import runtime, metrics
+from backend.inference.ipc import FrameRing, encode_message, read_message
+from backend.inference.tracking import FaceTracker
+from backend.inference.roi_cache import new_cache
+
+SOCKET_PATH = os.getenv("INFERENCE_SERVER", "") or "/tmp/emotia-inference.sock"
+# Los trackers de sesiones que ya no envían frames se liberan pasado este tiempo
+TRACKER_IDLE_SECONDS = 300
+
+
+class InferenceServer:
+    def __init__(self):
+        self.rings: dict[str, FrameRing] = {}
+        self.trackers: dict[int, list] = {}  # session_id -> [FaceTracker, ROICache, último uso]
+        self.connections = 0
+        self.requests = 0
+
+    def _ring(self, header) -> FrameRing:
+        ring = self.rings.get(header["ring"])
+        if ring is None:
+            ring = FrameRing.attach(header["ring"], header["slots"], header["slot_bytes"])
+            self.rings[ring.name] = ring
+        return ring
+
+    def _session(self, sid: int):
+        now = time.monotonic()
+        entry = self.trackers.get(sid)
+        if entry is None:
+            entry = self.trackers[sid] = [FaceTracker(), new_cache(), now]
+            metrics.set_sessions(len(self.trackers))
+        entry[2] = now
+        if self.requests % 500 == 0:
+            for old in [s for s, (_, _, seen) in self.trackers.items() if now - seen > TRACKER_IDLE_SECONDS]:
+                self.trackers.pop(old, None)
+            metrics.set_sessions(len(self.trackers))
+        return entry[0], entry[1]
+
+    async def _predict(self, header, payload):
+        self.requests += 1
+        # Sin payload, el frame está en el anillo del worker: se lee sin copiarlo
+        jpeg = payload or self._ring(header).view(header["slot"], header["len"])
+        if header["session"] is None:
+            # Imagen suelta (/predict): nada que recordar entre peticiones
+            tracker, cache = FaceTracker(), None
+        else:
+            tracker, cache = self._session(header["session"])
+        faces = await runtime.predict_frame_local(jpeg, tracker, cache)
+        return {"faces": [{"box": list(box) if box else None, "probs": p.tolist()} for box, p in faces]}
+
+    async def _swap(self, header, reply):
+        # La carga tarda: mientras, este mismo socket sigue atendiendo predicciones
+        try:
+            result = await runtime.swap_model(header.get("version"))
+        except Exception as e:
+            result = {"error": str(e)}
+        await reply({"id": header["id"], **result})
+
+    def stats(self) -> dict:
+        return {
+            **runtime.stats(),
+            "server": {
+                "connections": self.connections,
+                "requests": self.requests,
+                "sessions": len(self.trackers),
+                "rings": len(self.rings),
+                "cache_hits": sum(c.hits for _, c, _ in self.trackers.values() if c is not None),
+                "cache_misses": sum(c.misses for _, c, _ in self.trackers.values() if c is not None),
+            },
+        }
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        write_lock = asyncio.Lock()
+        tasks = set()
+        rings = set()
+
+        async def reply(message):
+            async with write_lock:
+                writer.write(encode_message(message))
+                await writer.drain()
+
+        async def predict(header, payload):
+            try:
+                result = await self._predict(header, payload)
+            except Exception as e:
+                result = {"error": str(e)}
+            await reply({"id": header["id"], **result})
+
+        try:
+            while True:
+                header, payload = await read_message(reader)
+                op = header.get("op")
+                if op == "predict":
+                    if "ring" in header:
+                        rings.add(header["ring"])
+                    task = asyncio.create_task(predict(header, payload))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                elif op == "close":
+                    self.trackers.pop(header["session"], None)
+                    metrics.set_sessions(len(self.trackers))
+                elif op == "stats":
+                    await reply({"id": header["id"], **self.stats()})
+                elif op == "metrics":
+                    await reply({"id": header["id"], "families": metrics.snapshot()})
+                elif op == "swap":
+                    task = asyncio.create_task(self._swap(header, reply))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections -= 1
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # El worker se fue: soltar su segmento (él es quien lo borra)
+            for name in rings:
+                ring = self.rings.pop(name, None)
+                if ring is not None:
+                    try:
+                        ring.close()
+                    except BufferError:
+                        pass
+            writer.close()
+
+
+async def main():
+    # Este proceso es el servidor: siempre predice en local aunque herede INFERENCE_SERVER
+    runtime.INFERENCE_SERVER = ""
+    runtime.load_predictor()
+    runtime.start_model_watch()
+    if os.path.exists(SOCKET_PATH):
+        os.unlink(SOCKET_PATH)
+    server = await asyncio.start_unix_server(InferenceServer().handle, path=SOCKET_PATH)
+    print(f"🧠 Servidor de inferencia ({runtime.INFERENCE_BACKEND}, versión {runtime.version.name}) "
+          f"escuchando en {SOCKET_PATH}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
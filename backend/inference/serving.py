@@ -0,0 +1,118 @@
+# backend/inference/serving.py
+import os
+
+import numpy as np
+import tensorflow as tf
+
+# ========================
+# ⚙️ Buckets de tamaño de lote
+# ========================
+# Cada lote se rellena hasta el bucket más cercano: las formas son siempre las mismas
+BATCH_BUCKETS = tuple(int(b) for b in os.getenv("PREDICT_BATCH_BUCKETS", "1,2,4,8,16,32").split(","))
+# Hilos del intérprete TFLite (backend tflite_fp16 / tflite_int8)
+TFLITE_THREADS = int(os.getenv("TFLITE_THREADS", str(os.cpu_count() or 1)))
+
+
+class BucketedPredictor:
+    """Base común: reparte cada lote en buckets de forma fija y rellena con ceros."""
+
+    backend = "base"
+
+    def __init__(self, input_shape, buckets=BATCH_BUCKETS):
+        self.input_shape = tuple(int(d) for d in input_shape)
+        self.buckets = sorted({int(b) for b in buckets if int(b) > 0})
+        if not self.buckets:
+            raise ValueError("PREDICT_BATCH_BUCKETS no puede estar vacío")
+
+    @property
+    def max_batch(self) -> int:
+        return self.buckets[-1]
+
+    def _run_bucket(self, b: int, chunk: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def warmup(self):
+        for b in self.buckets:
+            self._run_bucket(b, np.zeros((b, *self.input_shape), np.float32))
+
+    def _bucket_for(self, n: int) -> int:
+        for b in self.buckets:
+            if b >= n:
+                return b
+        return self.max_batch
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.asarray(batch, dtype=np.float32)
+        outputs = []
+        # Lotes mayores que el bucket más grande se parten en trozos
+        for start in range(0, len(batch), self.max_batch):
+            chunk = batch[start:start + self.max_batch]
+            n = len(chunk)
+            b = self._bucket_for(n)
+            if b > n:
+                pad = np.zeros((b - n, *chunk.shape[1:]), dtype=np.float32)
+                chunk = np.concatenate([chunk, pad])
+            outputs.append(self._run_bucket(b, chunk)[:n])
+        return np.concatenate(outputs) if outputs else np.zeros((0,), np.float32)
+
+
+class CompiledPredictor(BucketedPredictor):
+    """
+    Sustituye a `model.predict` para servir: una función concreta de tf.function
+    por cada bucket, con forma fija, trazada una sola vez en el arranque.
+    Evita el adaptador de datos, el callback de progreso y el bucle de pasos
+    que `predict` monta en cada llamada.
+    """
+
+    backend = "keras"
+
+    def __init__(self, model, buckets=BATCH_BUCKETS):
+        super().__init__(model.input_shape[1:], buckets)
+
+        @tf.function
+        def serve(x):
+            return model(x, training=False)
+
+        self._fns = {
+            b: serve.get_concrete_function(tf.TensorSpec((b, *self.input_shape), tf.float32))
+            for b in self.buckets
+        }
+
+    def _run_bucket(self, b, chunk):
+        return self._fns[b](tf.constant(chunk)).numpy()
+
+
+def _make_interpreter(model_path, num_threads):
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=str(model_path), num_threads=num_threads)
+
+
+class TFLitePredictor(BucketedPredictor):
+    """
+    Modelo cuantizado (float16 o int8, ver ia/export_tflite.py) en el intérprete TFLite.
+    Un intérprete por bucket, cada uno con sus tensores ya reservados para ese tamaño.
+    La entrada y la salida siguen siendo float32: la cuantización queda dentro del grafo.
+    """
+
+    def __init__(self, model_path, backend="tflite", buckets=BATCH_BUCKETS, num_threads=TFLITE_THREADS):
+        probe = _make_interpreter(model_path, num_threads)
+        super().__init__(probe.get_input_details()[0]["shape"][1:], buckets)
+        self.backend = backend
+        self.model_path = str(model_path)
+        self._interpreters = {}
+        for b in self.buckets:
+            interpreter = _make_interpreter(model_path, num_threads)
+            inp = interpreter.get_input_details()[0]
+            interpreter.resize_tensor_input(inp["index"], (b, *self.input_shape))
+            interpreter.allocate_tensors()
+            out = interpreter.get_output_details()[0]
+            self._interpreters[b] = (interpreter, inp["index"], out["index"])
+
+    def _run_bucket(self, b, chunk):
+        interpreter, in_idx, out_idx = self._interpreters[b]
+        interpreter.set_tensor(in_idx, chunk)
+        interpreter.invoke()
+        return interpreter.get_tensor(out_idx).copy()
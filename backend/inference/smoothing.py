@@ -0,0 +1,96 @@
+# backend/inference/smoothing.py
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+# ========================
+# 🎚️ Suavizado temporal de predicciones por sesión
+# ========================
+# ema / window / off (off: se emite cada frame, como antes)
+SMOOTHING_MODE = os.getenv("PREDICT_SMOOTHING", "ema")
+SMOOTHING_ALPHA = float(os.getenv("PREDICT_SMOOTHING_ALPHA", "0.3"))
+SMOOTHING_WINDOW = int(os.getenv("PREDICT_SMOOTHING_WINDOW", "8"))
+# Cambio mínimo de confianza (0-1) del rostro para volver a emitir
+EMIT_CONFIDENCE_DELTA = float(os.getenv("PREDICT_EMIT_DELTA", "0.1"))
+HEARTBEAT_SECONDS = float(os.getenv("PREDICT_HEARTBEAT_SECONDS", "5"))
+
+
+class PredictionSmoother:
+    """
+    Suaviza el vector de probabilidades de cada rostro (EMA o media de ventana)
+    y decide si vale la pena emitir: solo cuando cambia la emoción principal
+    suavizada, su confianza se mueve más de `emit_delta` o cambia el número de
+    rostros. Sin cambios, se emite un latido cada `heartbeat_seconds`.
+    """
+
+    def __init__(self, mode=SMOOTHING_MODE, alpha=SMOOTHING_ALPHA, window=SMOOTHING_WINDOW,
+                 emit_delta=EMIT_CONFIDENCE_DELTA, heartbeat_seconds=HEARTBEAT_SECONDS):
+        if mode not in ("ema", "window", "off"):
+            raise ValueError(f"PREDICT_SMOOTHING inválido: {mode}")
+        self.mode = mode
+        self.alpha = alpha
+        self.window = window
+        self.emit_delta = emit_delta
+        self.heartbeat_seconds = heartbeat_seconds
+        self._state = []      # por rostro: vector EMA o ventana de vectores
+        self._emitted = None  # [(índice, confianza)] del último mensaje
+        self._last_emit = 0.0
+        self.frames = 0
+        self.emitted = 0
+        self.heartbeats = 0
+
+    def _smooth(self, probs: list) -> list:
+        if self.mode == "off":
+            return probs
+        if len(probs) != len(self._state):
+            # Entró o salió un rostro: se reinicia el estado
+            self._state = [deque([p], maxlen=self.window) if self.mode == "window" else p for p in probs]
+        elif self.mode == "ema":
+            self._state = [self.alpha * p + (1 - self.alpha) * s for p, s in zip(probs, self._state)]
+        else:
+            for p, window in zip(probs, self._state):
+                window.append(p)
+        if self.mode == "window":
+            return [np.mean(window, axis=0) for window in self._state]
+        return list(self._state)
+
+    def _changed(self, summary) -> bool:
+        if self.mode == "off" or self._emitted is None or len(summary) != len(self._emitted):
+            return True
+        return any(
+            idx != last_idx or abs(conf - last_conf) >= self.emit_delta
+            for (idx, conf), (last_idx, last_conf) in zip(summary, self._emitted)
+        )
+
+    def push(self, probs: list):
+        """Devuelve (vectores suavizados, motivo) con motivo "change", "heartbeat" o None (no emitir)."""
+        self.frames += 1
+        smoothed = self._smooth([np.asarray(p, dtype=np.float32) for p in probs])
+        summary = [(int(np.argmax(s)), float(np.max(s))) for s in smoothed]
+        if self._changed(summary):
+            self._emitted = summary
+            self.emitted += 1
+            self._last_emit = time.monotonic()
+            return smoothed, "change"
+        if self.heartbeat_due():
+            self.mark_heartbeat()
+            return smoothed, "heartbeat"
+        return smoothed, None
+
+    def heartbeat_due(self) -> bool:
+        return time.monotonic() - self._last_emit >= self.heartbeat_seconds
+
+    def mark_heartbeat(self):
+        self.heartbeats += 1
+        self._last_emit = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "frames": self.frames,
+            "emitted": self.emitted,
+            "heartbeats": self.heartbeats,
+            "emit_ratio": round((self.emitted + self.heartbeats) / self.frames, 3) if self.frames else None,
+        }
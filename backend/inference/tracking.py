@@ -0,0 +1,51 @@
+# backend/inference/tracking.py
+import os
+from collections import Counter
+
+# ========================
+# ⚙️ Configuración del seguimiento de rostro
+# ========================
+TRACK_MAX_REUSE = int(os.getenv("FACE_TRACK_MAX_REUSE", "5"))          # frames seguidos reutilizando la caja
+TRACK_MARGIN = float(os.getenv("FACE_TRACK_MARGIN", "0.1"))            # margen añadido a la caja reutilizada
+TRACK_SEARCH_SCALE = float(os.getenv("FACE_TRACK_SEARCH_SCALE", "2.0"))  # tamaño de la zona de búsqueda local
+TRACK_MAX_DIFF = float(os.getenv("FACE_TRACK_MAX_DIFF", "20"))         # diferencia media (0-255) tolerada
+
+
+class FaceTracker:
+    """
+    Estado de seguimiento de una sesión. No toca imágenes: decide qué pista
+    enviar al pipeline (que puede correr en otro proceso) y guarda lo que devuelve.
+    - hasta max_reuse frames se reutilizan las últimas cajas si las firmas no cambiaron
+    - después, o si la comprobación falla, un rostro único se busca cerca de su caja
+    - si tampoco aparece (o hay varios rostros), se vuelve a la detección completa
+    """
+
+    def __init__(self, max_reuse=TRACK_MAX_REUSE):
+        self.max_reuse = max_reuse
+        self.boxes = []
+        self.signatures = []
+        self.reused = 0
+        self.methods: Counter = Counter()  # reuse / local / full / none
+
+    def hint(self):
+        if not self.boxes:
+            return None
+        return {"boxes": self.boxes, "signatures": self.signatures, "reuse": self.reused < self.max_reuse}
+
+    def update(self, state):
+        method = state["method"]
+        self.methods[method] += 1
+        if method == "reuse":
+            self.reused += 1
+        else:
+            self.boxes = list(state["boxes"])
+            self.signatures = list(state["signatures"])
+            self.reused = 0
+
+    def stats(self) -> dict:
+        total = sum(self.methods.values())
+        skipped = self.methods["reuse"]
+        return {
+            "methods": dict(self.methods),
+            "detection_skip_rate": round(skipped / total, 3) if total else 0.0,
+        }
@@ -1,25 +1,22 @@
 import os
-import json
-import base64
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 
-import numpy as np
-import cv2
-import jwt
 from dotenv import load_dotenv
-from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Security, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from passlib.context import CryptContext
 
-from backend.database import SessionLocal
+from backend.database import get_db
 from backend.models import User, Detection, SessionModel
+# Los routers importaban estas funciones desde aquí: se mantienen re-exportadas
+from backend.auth import get_password_hash, verify_password, create_access_token, get_current_user
+from backend.inference import runtime
+from backend.broker import broker
+from backend.detection_writer import detection_writer
 
 # ========================
 # 🌱 Configuración inicial
@@ -40,41 +37,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ========================
-# 🔐 Autenticación con JWT
-# ========================
-SECRET_KEY = os.getenv("SECRET_KEY", "clave-super-secreta")
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-security = HTTPBearer()
-
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-def get_password_hash(password: str):
-    if len(password) > 72:
-        password = password[:72]
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def create_access_token(data: dict):
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    data.update({"exp": expire})
-    return jwt.encode(data, SECRET_KEY, algorithm=ALGORITHM)
-
-
 # ========================
 # 📌 Modelos Pydantic
 # ========================
@@ -133,23 +95,6 @@ def register(payload: RegisterPayload, db: Session = Depends(get_db)):
     return {"id": user.id, "email": user.email, "role": user.role}
 
 
-# ========================
-# 🔐 Obtener usuario actual
-# ========================
-def get_current_user(credentials: HTTPAuthorizationCredentials = Security(security), db: Session = Depends(get_db)):
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email = payload.get("sub")
-    except Exception:
-        raise HTTPException(status_code=401, detail="Token inválido")
-
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="Usuario no encontrado")
-    return user
-
-
 # ========================
 # 📸 IA y Detecciones
 # ========================
@@ -208,78 +153,6 @@ def create_session(db: Session = Depends(get_db), current_user: User = Depends(g
     return {"session_id": session.id, "started_at": session.started_at.isoformat()}
 
 
-# ========================
-# 🌐 WebSocket IA (stream)
-# ========================
-from tensorflow.keras.models import load_model
-
-MODEL_PATH = ROOT / "ia" / "models" / "best_model.keras"
-CLASS_IDX_PATH = ROOT / "ia" / "models" / "class_indices.json"
-
-if not MODEL_PATH.exists():
-    raise FileNotFoundError(f"❌ Modelo no encontrado en: {MODEL_PATH}")
-
-model = load_model(str(MODEL_PATH), compile=False)
-if CLASS_IDX_PATH.exists():
-    with open(CLASS_IDX_PATH, "r", encoding="utf-8") as f:
-        class_indices = json.load(f)
-    CLASS_NAMES = [class_indices[str(i)] for i in range(len(class_indices))]
-else:
-    CLASS_NAMES = ['angry', 'disgust', 'fear', 'happy', 'neutral', 'sad', 'surprise']
-
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
-
-
-def predict_from_bytes(frame_bytes: bytes):
-    arr = np.frombuffer(frame_bytes, dtype=np.uint8)
-    img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-    if img is None:
-        return None
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
-    if len(faces) > 0:
-        x, y, w, h = faces[0]
-        roi = gray[y:y + h, x:x + w]
-    else:
-        h_img, w_img = gray.shape
-        m = min(h_img, w_img)
-        sx = w_img // 2 - m // 2
-        sy = h_img // 2 - m // 2
-        roi = gray[sy:sy + m, sx:sx + m]
-    roi = cv2.resize(roi, (48, 48)).astype("float32") / 255.0
-    roi = np.expand_dims(np.expand_dims(roi, -1), 0)
-    preds = model.predict(roi, verbose=0)[0]
-    idx = int(np.argmax(preds))
-    return {"emotion": CLASS_NAMES[idx], "confidence": float(preds[idx])}
-
-
-SESSION_CLIENTS: dict[int, set] = {}
-
-
-@app.websocket("/ws/predict/{session_id}")
-async def ws_predict(websocket: WebSocket, session_id: int):
-    await websocket.accept()
-    sid = int(session_id)
-    if sid not in SESSION_CLIENTS:
-        SESSION_CLIENTS[sid] = set()
-    SESSION_CLIENTS[sid].add(websocket)
-    try:
-        while True:
-            data = await websocket.receive_json()
-            if data.get("type") == "frame":
-                b64 = data.get("data").split(",")[-1]
-                frame_bytes = base64.b64decode(b64)
-                pred = predict_from_bytes(frame_bytes)
-                if pred:
-                    payload = {"type": "prediction", **pred}
-                    for client in list(SESSION_CLIENTS.get(sid, [])):
-                        try:
-                            await client.send_json(payload)
-                        except Exception:
-                            SESSION_CLIENTS[sid].discard(client)
-    except WebSocketDisconnect:
-        SESSION_CLIENTS[sid].discard(websocket)
-
 # Importar routers (mantener como antes)
 from backend.routes import admin
 from backend.routes import admin_reports
@@ -287,6 +160,7 @@ from backend.routes import psychologist_reports
 from backend.routes import psychologist
 from backend.routes import chat_ws, chat_rest
 from backend.routes import meetings
+from backend.routes import realtime_predict
 
 # 🟢 Montar los routers de la API PRIMERO
 app.include_router(admin.router)
@@ -296,6 +170,27 @@ app.include_router(psychologist.router)
 app.include_router(chat_ws.router)
 app.include_router(chat_rest.router)
 app.include_router(meetings.router)
+app.include_router(realtime_predict.router)
+
+
+# ========================
+# 🧠 Arranque del subsistema de predicción
+# ========================
+@app.on_event("startup")
+async def start_inference():
+    # TensorFlow se carga en segundo plano: login, chat y REST no esperan al modelo
+    if os.getenv("INFERENCE_WARMUP", "1") == "1":
+        runtime.warm_up_in_background()
+    # Versiones nuevas del registro sin reiniciar (MODEL_WATCH_SECONDS)
+    runtime.start_model_watch()
+
+
+@app.on_event("shutdown")
+async def shutdown_inference():
+    # Primero se guardan las detecciones pendientes
+    await detection_writer.drain()
+    runtime.shutdown()
+    await broker.close()
 
 # 🟢 Servir la carpeta frontend bajo /static para evitar colisiones con la API
 FRONTEND_DIR = ROOT / "app_desktop" / "views"
@@ -3,7 +3,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from backend.database import SessionLocal
 from backend.models import User
-from backend.main import get_current_user
+from backend.auth import get_current_user
+from backend.inference import runtime, registry
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -44,7 +45,7 @@ def add_patient(data: dict, db: Session = Depends(get_db), current_user: User =
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="No autorizado")
 
-    from backend.main import get_password_hash
+    from backend.auth import get_password_hash
 
     email = data.get("email")
     if db.query(User).filter(User.email == email).first():
@@ -141,7 +142,7 @@ def add_psychologist(data: dict, db: Session = Depends(get_db), current_user: Us
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="No autorizado")
 
-    from backend.main import get_password_hash
+    from backend.auth import get_password_hash
 
     email = data.get("email")
     if db.query(User).filter(User.email == email).first():
@@ -181,3 +182,45 @@ def delete_psychologist(psy_id: int, db: Session = Depends(get_db), current_user
     db.commit()
     return {"message": "Psicólogo eliminado correctamente"}
 
+
+
+# ================================
+# 🧠 Versiones del modelo de IA
+# ================================
+@router.get("/models")
+async def list_models(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+    try:
+        serving = await runtime.serving_version()
+    except Exception:
+        serving = None
+    return {
+        "active": registry.active_name(),
+        "serving": serving,
+        "versions": [v.describe() for v in registry.list_versions()],
+    }
+
+
+# ================================
+# 🔄 Poner en servicio otra versión (sin reiniciar)
+# ================================
+@router.post("/models/{version}/activate")
+async def activate_model(version: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+    try:
+        registry.get_version(version)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Versión no encontrada")
+    try:
+        result = await runtime.swap_model(version)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    # Queda como activa para los reinicios y para los procesos que vigilan el registro
+    registry.set_active(version)
+    return result
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from backend.database import SessionLocal
 from backend.models import User, Report, Appointment
-from backend.main import get_current_user
+from backend.auth import get_current_user
 
 router = APIRouter(prefix="/admin/reports", tags=["Admin Reports"])
 
@@ -1,6 +1,6 @@
 # backend/routes/chat.py
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from backend.main import get_current_user
+from backend.auth import get_current_user
 from typing import List, Dict
 
 router = APIRouter(prefix="/ws", tags=["Chat"])
@@ -1,14 +1,40 @@
 # backend/routes/chat_ws.py
+import os
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
 from backend.database import SessionLocal
 from backend.models import Message, User
+from backend.broker import broker
+from backend.inference.outbox import ClientOutbox, close_in_background
 from datetime import datetime
 
 router = APIRouter(prefix="/ws", tags=["Chat WebSocket"])
 
-# 🟢 Diccionario de conexiones activas: { user_id: WebSocket }
+# 🟢 Diccionario de conexiones activas en ESTE worker: { user_id: WebSocket }
+# Los mensajes viajan por el broker (canal chat:<user_id>), así emisor y
+# receptor pueden estar conectados a workers distintos
 active_connections: dict[int, WebSocket] = {}
+# Cola de salida de cada socket de chat (más larga que la de predicciones: aquí
+# descartar es perder mensajes); si no da abasto, se expulsa al cliente
+CHAT_OUTBOX_MAX_MESSAGES = int(os.getenv("CHAT_OUTBOX_MAX_MESSAGES", "64"))
+
+
+def user_delivery(outbox: ClientOutbox):
+    """Lo publicado en chat:<user_id> va a la cola del socket; el broker no espera al cliente."""
+    async def deliver(message: str):
+        outbox.put(message)
+    return deliver
+
+
+def evict_chat_client(user_id: int):
+    def on_evict(outbox: ClientOutbox, reason: str):
+        print(f"⚠️ Usuario {user_id} expulsado del chat: {reason}")
+        close_in_background(outbox.websocket)
+    return on_evict
+
+
+async def send_to_user(user_id: int, message: str):
+    await broker.publish(f"chat:{user_id}", message)
 
 
 # ======================================================
@@ -29,13 +55,18 @@ def get_db():
 async def websocket_endpoint(websocket: WebSocket, user_id: int, receiver_id: int):
     await websocket.accept()
     active_connections[user_id] = websocket
+    outbox = ClientOutbox(websocket, on_evict=evict_chat_client(user_id), max_messages=CHAT_OUTBOX_MAX_MESSAGES)
+    deliver = user_delivery(outbox)
+    await broker.subscribe(f"chat:{user_id}", deliver)
     print(f"🟢 Usuario {user_id} conectado al chat con {receiver_id}")
 
-    # 🔔 Notificar al receptor que este usuario está en línea
-    if receiver_id in active_connections:
-        await active_connections[receiver_id].send_text(f"status:{user_id}:online")
-
     try:
+        # 🔔 Notificar al receptor que este usuario está en línea
+        try:
+            await send_to_user(receiver_id, f"status:{user_id}:online")
+        except Exception as e:
+            print(f"⚠️ Error notificando conexión a {receiver_id}: {e}")
+
         while True:
             # Esperar mensajes del cliente
             message_text = await websocket.receive_text()
@@ -58,30 +89,28 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int, receiver_id: in
             finally:
                 db.close()
 
-            # Enviar mensaje al receptor si está conectado
-            if receiver_id in active_connections:
-                try:
-                    await active_connections[receiver_id].send_text(f"{user_id}:{message_text}")
-                    print(f"📤 Enviado a {receiver_id}")
-                except Exception as e:
-                    print(f"⚠️ Error enviando a receptor {receiver_id}: {e}")
-
-            # Reflejar el mensaje al propio emisor
+            # Enviar mensaje al receptor (le llega si está conectado en cualquier worker)
             try:
-                await websocket.send_text(f"yo:{message_text}")
+                await send_to_user(receiver_id, f"{user_id}:{message_text}")
+                print(f"📤 Enviado a {receiver_id}")
             except Exception as e:
-                print(f"⚠️ Error enviando eco al emisor {user_id}: {e}")
+                print(f"⚠️ Error enviando a receptor {receiver_id}: {e}")
+
+            # Reflejar el mensaje al propio emisor (por la misma cola: mantiene el orden)
+            outbox.put(f"yo:{message_text}")
 
     except WebSocketDisconnect:
         # 🔴 Usuario se desconectó
-        if user_id in active_connections:
-            del active_connections[user_id]
         print(f"🔴 Usuario {user_id} desconectado")
 
         # Notificar al receptor que este usuario se desconectó
-        if receiver_id in active_connections:
-            try:
-                await active_connections[receiver_id].send_text(f"status:{user_id}:offline")
-                print(f"🔕 Aviso de desconexión enviado a {receiver_id}")
-            except Exception as e:
-                print(f"⚠️ Error notificando desconexión a {receiver_id}: {e}")
+        try:
+            await send_to_user(receiver_id, f"status:{user_id}:offline")
+            print(f"🔕 Aviso de desconexión enviado a {receiver_id}")
+        except Exception as e:
+            print(f"⚠️ Error notificando desconexión a {receiver_id}: {e}")
+    finally:
+        if active_connections.get(user_id) is websocket:
+            del active_connections[user_id]
+        outbox.close()
+        await broker.unsubscribe(f"chat:{user_id}", deliver)
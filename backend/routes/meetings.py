@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 from backend.database import SessionLocal
 from backend.models import Appointment, User
-from backend.main import get_current_user
+from backend.auth import get_current_user
 
 router = APIRouter(prefix="/meetings", tags=["Meetings"])
 
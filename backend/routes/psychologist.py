@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from backend.database import SessionLocal
 from backend.models import User, Detection
-from backend.main import get_current_user
+from backend.auth import get_current_user
 
 router = APIRouter(prefix="/psychologist", tags=["Psychologist"])
 
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 from backend.database import SessionLocal
 from backend.models import User, Report, SessionModel
-from backend.main import get_current_user
+from backend.auth import get_current_user
 from backend.models import User, Report, SessionModel, Appointment
 
 router = APIRouter(
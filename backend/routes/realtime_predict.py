@@ -0,0 +1,309 @@
+# backend/routes/realtime_predict.py
+import os
+import json
+import time
+import asyncio
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, UploadFile, File, Form, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from backend.broker import broker
+from backend.detection_writer import detection_writer
+from backend.inference import runtime, metrics
+from backend.inference.tracking import FaceTracker
+from backend.inference.frame_slot import FrameSlot
+from backend.inference.smoothing import PredictionSmoother
+from backend.inference.roi_cache import ROICache, new_cache
+from backend.inference.outbox import ClientOutbox, close_in_background
+from backend.inference.protocol import parse_binary_frame, parse_text_frame
+
+router = APIRouter(tags=["Predicción en vivo"])
+
+
+# ========================
+# 📊 Estado del subsistema de inferencia
+# ========================
+@router.get("/inference/stats")
+async def inference_stats():
+    stats = runtime.stats()
+    if runtime.client is not None:
+        try:
+            stats["server"] = await runtime.client.server_stats()
+        except Exception as e:
+            stats["server"] = {"error": str(e)}
+    return {
+        **stats,
+        "broker": broker.stats(),
+        "persistence": detection_writer.stats(),
+        "sessions": {
+            str(sid): {
+                **slot.stats(),
+                "tracking": SESSION_TRACKERS[sid].stats(),
+                "smoothing": SESSION_SMOOTHERS[sid].stats() if sid in SESSION_SMOOTHERS else None,
+                "cache": SESSION_CACHES[sid].stats() if SESSION_CACHES.get(sid) is not None else None,
+                "clients": [outbox.stats() for outbox in SESSION_CLIENTS.get(sid, {}).values()],
+            }
+            for sid, slot in SESSION_SLOTS.items()
+            if sid in SESSION_TRACKERS
+        },
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Métricas por etapa en formato Prometheus (con las del servidor de inferencia si hay uno)."""
+    snapshots = [metrics.snapshot()]
+    if runtime.client is not None:
+        try:
+            snapshots.append(metrics.snapshot_labels(
+                await runtime.client.server_metrics(), {"process": "inference_server"}
+            ))
+        except Exception as e:
+            print(f"⚠️ No se pudieron leer las métricas del servidor de inferencia: {e}")
+    return PlainTextResponse(metrics.render(*snapshots), media_type=metrics.CONTENT_TYPE)
+
+
+# ========================
+# 📸 Predicción por imágenes (REST)
+# ========================
+# Imágenes por petición como máximo: todas se leen en memoria antes de procesarlas
+PREDICT_MAX_FILES = int(os.getenv("PREDICT_MAX_FILES", "64"))
+
+
+async def predict_upload(index: int, filename: str, image: bytes) -> dict:
+    try:
+        faces = await runtime.predict_image(image)
+    except Exception as e:
+        return {"type": "error", "index": index, "filename": filename, "error": str(e)}
+    # Sin detección la pipeline devuelve el recorte central sin caja: aquí es "sin rostro"
+    if not faces or faces[0][0] is None:
+        return {"type": "error", "index": index, "filename": filename, "error": "No se detectó ningún rostro"}
+    results = [{"box": list(box) if box else None, **runtime.decode_prediction(p)} for box, p in faces]
+    return {"type": "prediction", "index": index, "filename": filename, **results[0], "faces": results}
+
+
+async def save_detections(results: list, session_id: int | None) -> dict:
+    """Rostro principal de cada imagen -> Detection, en un solo INSERT. Devuelve {índice: id}."""
+    ok = [r for r in results if r["type"] == "prediction"]
+    if not ok:
+        return {}
+    rows = [
+        {"session_id": session_id, "image_name": r["filename"], "emotion": r["emotion"],
+         "confidence": str(round(r["confidence"], 4))}
+        for r in ok
+    ]
+    ids = await asyncio.to_thread(detection_writer.insert_now, rows)
+    return {r["index"]: detection_id for r, detection_id in zip(ok, ids)}
+
+
+async def stream_predictions(images: list, save: bool, session_id: int | None):
+    # Todas a la vez: la detección se reparte en el executor y los rostros comparten lotes
+    tasks = [asyncio.create_task(predict_upload(*image)) for image in images]
+    results = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            results.append(result)
+            yield json.dumps(result) + "\n"
+    finally:
+        # Si el cliente se desconecta no se sigue procesando
+        for task in tasks:
+            task.cancel()
+    summary = {
+        "type": "summary",
+        "images": len(results),
+        "predicted": sum(r["type"] == "prediction" for r in results),
+        "errors": sum(r["type"] == "error" for r in results),
+    }
+    if save:
+        try:
+            summary["detection_ids"] = {str(i): d for i, d in (await save_detections(results, session_id)).items()}
+        except Exception as e:
+            summary["save_error"] = str(e)
+    yield json.dumps(summary) + "\n"
+
+
+@router.post("/predict")
+async def predict_images(
+    file: UploadFile | None = File(None),
+    files: list[UploadFile] | None = File(None),
+    save: bool = Form(False),
+    session_id: int | None = Form(None),
+):
+    """
+    Una imagen en `file` -> JSON con la emoción del rostro principal (y todos los rostros).
+    Varias en `files` -> NDJSON: una línea por imagen según van terminando y un resumen al final.
+    Con save=true el rostro principal de cada imagen se guarda como Detection.
+    """
+    uploads = ([file] if file is not None else []) + (files or [])
+    if not uploads:
+        raise HTTPException(status_code=400, detail="Envía una imagen en `file` o varias en `files`")
+    if len(uploads) > PREDICT_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"Máximo {PREDICT_MAX_FILES} imágenes por petición")
+    images = [(i, upload.filename or f"imagen_{i}", await upload.read()) for i, upload in enumerate(uploads)]
+
+    if len(images) == 1 and not files:
+        result = await predict_upload(*images[0])
+        if result["type"] == "error":
+            raise HTTPException(status_code=422, detail=result["error"])
+        if save:
+            result["detection_id"] = (await save_detections([result], session_id)).get(0)
+        return result
+    return StreamingResponse(stream_predictions(images, save, session_id), media_type="application/x-ndjson")
+
+
+# ========================
+# 🌐 WebSocket IA (stream)
+# ========================
+# Clientes conectados a ESTE worker, cada uno con su cola de salida; las predicciones
+# llegan por el broker desde el worker que recibe los frames de la sesión
+SESSION_CLIENTS: dict[int, dict[WebSocket, ClientOutbox]] = {}
+SESSION_DELIVERY: dict[int, object] = {}
+# Un único frame pendiente por sesión y una tarea que lo procesa
+SESSION_SLOTS: dict[int, FrameSlot] = {}
+SESSION_WORKERS: dict[int, asyncio.Task] = {}
+# Última caja del rostro por sesión: evita la detección completa en cada frame
+SESSION_TRACKERS: dict[int, FaceTracker] = {}
+
+
+# Predicciones recientes por huella del ROI (None si la caché está desactivada)
+SESSION_CACHES: dict[int, ROICache | None] = {}
+# Suavizado de la sesión: solo se publica cuando la emoción cambia (o un latido)
+SESSION_SMOOTHERS: dict[int, PredictionSmoother] = {}
+# Latidos sin frames: solo desde el worker que recibe los frames de la sesión (los que
+# solo tienen espectadores callan) y hasta este tiempo después del último frame
+HEARTBEAT_IDLE_SECONDS = float(os.getenv("PREDICT_HEARTBEAT_IDLE_SECONDS", "30"))
+
+
+async def publish(sid: int, payload: dict):
+    start = time.perf_counter()
+    try:
+        await broker.publish(f"predict:{sid}", json.dumps(payload))
+    except Exception as e:
+        print(f"⚠️ No se pudo publicar la predicción de la sesión {sid}: {e}")
+        return
+    metrics.STAGE_SECONDS.observe(time.perf_counter() - start, stage="broadcast")
+
+
+async def process_session_frames(sid: int, slot: FrameSlot, tracker: FaceTracker,
+                                 smoother: PredictionSmoother, cache: ROICache | None):
+    while True:
+        try:
+            seq, frame = await asyncio.wait_for(slot.get(), smoother.heartbeat_seconds)
+        except asyncio.TimeoutError:
+            # Sin frames: latido para que los clientes sepan que la sesión sigue viva
+            if slot.idle_seconds() <= HEARTBEAT_IDLE_SECONDS:
+                smoother.mark_heartbeat()
+                await publish(sid, {"type": "heartbeat"})
+            continue
+        try:
+            faces = await runtime.predict_frame(sid, frame, tracker, cache)
+        except Exception as e:
+            print(f"⚠️ Error procesando frame de la sesión {sid}: {e}")
+            continue
+        if not faces:
+            continue
+        # Historial de la sesión: rostro principal de cada frame, sin esperar a la BD
+        top = runtime.decode_prediction(faces[0][1])
+        detection_writer.record(sid, top["emotion"], top["confidence"], f"live:{sid}:{seq if seq is not None else ''}")
+        smoothed, reason = smoother.push([p for _, p in faces])
+        if reason is None:
+            continue
+        results = [
+            {"box": list(box) if box else None, **runtime.decode_prediction(p)}
+            for (box, _), p in zip(faces, smoothed)
+        ]
+        # emotion/confidence del rostro principal para los clientes de un solo rostro
+        payload = {"type": "prediction", **results[0], "faces": results}
+        if reason == "heartbeat":
+            payload["heartbeat"] = True
+        if seq is not None:
+            payload["seq"] = seq
+        await publish(sid, payload)
+
+
+def session_delivery(sid: int):
+    """Reparte lo publicado en predict:<sid> en las colas de los clientes de este worker, sin esperar."""
+    async def deliver(message: str):
+        for outbox in list(SESSION_CLIENTS.get(sid, {}).values()):
+            outbox.put(message)
+    return deliver
+
+
+def evict_client(sid: int):
+    """Quita de la sesión a un cliente lento; su bucle de recepción termina al cerrarse el socket."""
+    def on_evict(outbox: ClientOutbox, reason: str):
+        SESSION_CLIENTS.get(sid, {}).pop(outbox.websocket, None)
+        print(f"⚠️ Cliente expulsado de la sesión {sid}: {reason}")
+        close_in_background(outbox.websocket)
+    return on_evict
+
+
+@router.websocket("/ws/predict/{session_id}")
+async def ws_predict(websocket: WebSocket, session_id: int):
+    await websocket.accept()
+    sid = int(session_id)
+    if sid not in SESSION_CLIENTS:
+        SESSION_CLIENTS[sid] = {}
+        SESSION_DELIVERY[sid] = session_delivery(sid)
+        await broker.subscribe(f"predict:{sid}", SESSION_DELIVERY[sid])
+    SESSION_CLIENTS[sid][websocket] = ClientOutbox(websocket, on_evict=evict_client(sid))
+    slot = SESSION_SLOTS.setdefault(sid, FrameSlot())
+    metrics.set_sessions(len(SESSION_SLOTS))
+    tracker = SESSION_TRACKERS.setdefault(sid, FaceTracker())
+    smoother = SESSION_SMOOTHERS.setdefault(sid, PredictionSmoother())
+    if sid not in SESSION_CACHES:
+        # Con servidor de inferencia la caché de la sesión vive allí: aquí no se consultaría
+        SESSION_CACHES[sid] = None if runtime.INFERENCE_SERVER else new_cache()
+    if sid not in SESSION_WORKERS or SESSION_WORKERS[sid].done():
+        SESSION_WORKERS[sid] = asyncio.create_task(
+            process_session_frames(sid, slot, tracker, smoother, SESSION_CACHES[sid])
+        )
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            try:
+                if message.get("bytes") is not None:
+                    frame = parse_binary_frame(message["bytes"])
+                elif message.get("text"):
+                    frame = parse_text_frame(message["text"])
+                else:
+                    continue
+            except ValueError as e:
+                print(f"⚠️ Frame inválido en la sesión {sid}: {e}")
+                continue
+            if frame is not None:
+                metrics.FRAMES_RECEIVED.inc()
+                # Si el servidor va atrasado, el frame anterior sin procesar se descarta
+                if slot.pending:
+                    metrics.FRAMES_DROPPED.inc()
+                slot.put(frame)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await leave_session(sid, websocket)
+
+
+async def leave_session(sid: int, websocket: WebSocket):
+    """Quita al cliente de la sesión; el último en salir cierra la sesión en este worker."""
+    clients = SESSION_CLIENTS.get(sid)
+    if clients is None:
+        return
+    outbox = clients.pop(websocket, None)
+    if outbox is not None:
+        outbox.close()
+    if not clients:
+        SESSION_CLIENTS.pop(sid, None)
+        await broker.unsubscribe(f"predict:{sid}", SESSION_DELIVERY.pop(sid))
+        SESSION_SLOTS.pop(sid, None)
+        metrics.set_sessions(len(SESSION_SLOTS))
+        SESSION_TRACKERS.pop(sid, None)
+        SESSION_SMOOTHERS.pop(sid, None)
+        SESSION_CACHES.pop(sid, None)
+        worker = SESSION_WORKERS.pop(sid, None)
+        if worker is not None:
+            worker.cancel()
+        await runtime.end_session(sid)
+        detection_writer.forget(sid)
@@ -1,7 +1,7 @@
 # backend/seed_data.py
 from backend.database import SessionLocal
 from backend.models import User
-from backend.main import get_password_hash
+from backend.auth import get_password_hash
 
 db = SessionLocal()
 
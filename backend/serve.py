@@ -0,0 +1,76 @@
+# backend/serve.py
+"""
+Arranca el servidor de inferencia compartido y la API con varios workers de uvicorn.
+Todos los workers envían sus frames al mismo proceso con el modelo y reparten
+predicciones y chat por el broker (BROKER_URL; si no hay uno, se lanza el local).
+
+Uso: python -m backend.serve [--workers 4] [--host 0.0.0.0] [--port 8000]
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+
+import uvicorn
+
+DEFAULT_SOCKET = "/tmp/emotia-inference.sock"
+DEFAULT_BROKER_PORT = 6390
+
+
+def wait_until(ready, proc: subprocess.Popen, name: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while not ready():
+        if proc.poll() is not None:
+            raise SystemExit(f"❌ {name} terminó con código {proc.returncode}")
+        if time.monotonic() > deadline:
+            raise SystemExit(f"❌ {name} no arrancó a tiempo")
+        time.sleep(0.2)
+
+
+def port_open(port: int) -> bool:
+    with socket.socket() as s:
+        return s.connect_ex(("127.0.0.1", port)) == 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--socket", default=os.getenv("INFERENCE_SERVER", "") or DEFAULT_SOCKET)
+    parser.add_argument("--broker-port", type=int, default=DEFAULT_BROKER_PORT, help="puerto del broker local")
+    parser.add_argument("--timeout", type=float, default=120, help="espera máxima a que cargue el modelo")
+    args = parser.parse_args()
+
+    children = []
+    try:
+        # Con varios workers el broker en memoria no sirve: sin BROKER_URL se usa el local
+        if not os.getenv("BROKER_URL"):
+            broker = subprocess.Popen([sys.executable, "-m", "backend.broker", "--port", str(args.broker_port)])
+            children.append(broker)
+            wait_until(lambda: port_open(args.broker_port), broker, "El broker local", 10)
+            os.environ["BROKER_URL"] = f"redis://127.0.0.1:{args.broker_port}"
+
+        # Los workers de uvicorn heredan el entorno: todos usan el mismo servidor
+        os.environ["INFERENCE_SERVER"] = args.socket
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        server = subprocess.Popen([sys.executable, "-m", "backend.inference.server"])
+        children.append(server)
+        wait_until(lambda: os.path.exists(args.socket), server, "El servidor de inferencia", args.timeout)
+
+        uvicorn.run("backend.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        for proc in children:
+            proc.terminate()
+        for proc in children:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+if __name__ == "__main__":
+    main()
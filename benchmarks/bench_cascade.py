@@ -0,0 +1,153 @@
+# benchmarks/bench_cascade.py
+"""
+Evalúa la cascada modelo ligero -> modelo pesado sobre data/test:
+- precisión y latencia por imagen del ligero solo, del pesado solo y de la cascada
+- tasa de escalado (fracción de rostros que llegan al modelo pesado)
+- barrido de umbrales (confianza mínima x margen top-2) para elegir
+  CASCADE_MIN_CONFIDENCE / CASCADE_MIN_MARGIN
+
+Los dos modelos salen del registro (backend/inference/registry.py), igual que en el
+servidor: CASCADE_LIGHT_VERSION es el ligero y la versión activa el pesado.
+La latencia es la de servir una imagen sola (lote de 1) en CPU.
+
+Uso: python benchmarks/bench_cascade.py --light ligero [--heavy base] [--out cascade.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from backend.inference import runtime, registry
+from backend.inference.cascade import CASCADE_MIN_CONFIDENCE, CASCADE_MIN_MARGIN, escalation_mask
+from ia.preprocessing import load_images
+
+DATA_TEST = ROOT / "data" / "test"
+CONFIDENCES = [0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+MARGINS = [0.0, 0.1, 0.2, 0.3]
+
+
+def load_split(class_names, folder=DATA_TEST):
+    paths, labels = [], []
+    for idx, name in enumerate(class_names):
+        for p in sorted((folder / name).glob("*.*")):
+            paths.append(p)
+            labels.append(idx)
+    return paths, np.array(labels)
+
+
+def timed_single(predictor, x):
+    """Probabilidades y segundos por imagen, una a una como llegan en vivo."""
+    preds, seconds = [], []
+    for row in x:
+        start = time.perf_counter()
+        preds.append(predictor(row[np.newaxis])[0])
+        seconds.append(time.perf_counter() - start)
+    return np.stack(preds), np.array(seconds)
+
+
+def summary(correct, seconds, escalated=None):
+    ms = seconds * 1e3
+    out = {
+        "accuracy": round(float(np.mean(correct)), 4),
+        "latency_ms_mean": round(float(ms.mean()), 3),
+        "latency_ms_p50": round(float(np.percentile(ms, 50)), 3),
+        "latency_ms_p95": round(float(np.percentile(ms, 95)), 3),
+    }
+    if escalated is not None:
+        out["escalation_rate"] = round(float(np.mean(escalated)), 4)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--light", default=os.getenv("CASCADE_LIGHT_VERSION", ""), help="versión del modelo ligero")
+    parser.add_argument("--heavy", default=None, help="versión del modelo pesado (por defecto, la activa)")
+    parser.add_argument("--backend", default=os.getenv("INFERENCE_BACKEND", "keras"))
+    parser.add_argument("--min-confidence", type=float, default=CASCADE_MIN_CONFIDENCE)
+    parser.add_argument("--min-margin", type=float, default=CASCADE_MIN_MARGIN)
+    parser.add_argument("--data", type=Path, default=DATA_TEST)
+    parser.add_argument("--out", type=Path, help="guardar los resultados en JSON")
+    args = parser.parse_args()
+    if not args.light:
+        parser.error("indica el modelo ligero con --light o CASCADE_LIGHT_VERSION")
+
+    runtime.INFERENCE_BACKEND = args.backend
+    heavy = runtime._load_version(registry.get_version(args.heavy or registry.active_name()), light_version="")
+    light = runtime._load_version(registry.get_version(args.light), light_version="")
+    if light.class_names != heavy.class_names:
+        raise SystemExit("❌ Los dos modelos deben tener las mismas clases")
+    paths, labels = load_split(heavy.class_names, args.data)
+    x_light, ok_light = load_images(paths, light.spec)
+    x_heavy, ok_heavy = load_images(paths, heavy.spec)
+    if len(ok_light) != len(paths) or len(ok_heavy) != len(paths):
+        raise SystemExit("❌ Hay imágenes ilegibles en " + str(args.data))
+    print(f"{len(paths)} imágenes | ligero {light.version.name} {light.spec.input_shape} | "
+          f"pesado {heavy.version.name} {heavy.spec.input_shape} | {args.backend}\n")
+
+    p_light, s_light = timed_single(light.predictor, x_light)
+    p_heavy, s_heavy = timed_single(heavy.predictor, x_heavy)
+    ok_l = p_light.argmax(1) == labels
+    ok_h = p_heavy.argmax(1) == labels
+
+    # Cascada real: el pesado solo corre para los escalados y su tiempo se suma al del ligero
+    escalate = escalation_mask(p_light, args.min_confidence, args.min_margin)
+    cascade_pred = p_light.argmax(1)
+    cascade_seconds = s_light.copy()
+    for i in np.flatnonzero(escalate):
+        start = time.perf_counter()
+        cascade_pred[i] = heavy.predictor(x_heavy[i][np.newaxis])[0].argmax()
+        cascade_seconds[i] += time.perf_counter() - start
+
+    results = {
+        "light": summary(ok_l, s_light),
+        "heavy": summary(ok_h, s_heavy),
+        "cascade": {"min_confidence": args.min_confidence, "min_margin": args.min_margin,
+                    **summary(cascade_pred == labels, cascade_seconds, escalate)},
+    }
+    for name, r in results.items():
+        extra = f", escalado {r['escalation_rate']:.1%}" if "escalation_rate" in r else ""
+        print(f"{name:8s} precisión {r['accuracy']:.3f} | {r['latency_ms_mean']:.2f} ms/imagen{extra}")
+
+    # Barrido con las probabilidades ya calculadas: latencia estimada con las medias de cada modelo
+    sweep = []
+    for conf in CONFIDENCES:
+        for margin in MARGINS:
+            mask = escalation_mask(p_light, conf, margin)
+            correct = np.where(mask, ok_h, ok_l)
+            sweep.append({
+                "min_confidence": conf,
+                "min_margin": margin,
+                "accuracy": round(float(correct.mean()), 4),
+                "escalation_rate": round(float(mask.mean()), 4),
+                "latency_ms_est": round(float((s_light.mean() + mask.mean() * s_heavy.mean()) * 1e3), 3),
+            })
+    print("\nconf  margen  precisión  escalado  ms/imagen (est.)")
+    for r in sweep:
+        print(f"{r['min_confidence']:.1f}   {r['min_margin']:.1f}     {r['accuracy']:.3f}     "
+              f"{r['escalation_rate']:6.1%}    {r['latency_ms_est']:.2f}")
+
+    if args.out:
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "backend": args.backend,
+            "images": len(paths),
+            "light_version": light.version.name,
+            "heavy_version": heavy.version.name,
+            **results,
+            "sweep": sweep,
+        }
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print("\nResultados guardados en", args.out)
+    light.close()
+    heavy.close()
+
+
+if __name__ == "__main__":
+    main()
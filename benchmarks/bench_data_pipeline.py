@@ -0,0 +1,82 @@
+# benchmarks/bench_data_pipeline.py
+"""
+Imágenes por segundo que entrega cada pipeline de ia/data_loader_images.py
+(ImageDataGenerator, tf.data y los shards de ia/dataset_cache.py) sobre data/train
+(o --data), sin modelo de por medio: lo que tarda en producir los lotes de
+entrenamiento de una época, con los aumentos.
+
+tf.data se mide dos veces: la primera época decodifica y llena la cache(), las
+siguientes salen de la cache (el caso normal de un entrenamiento de muchas épocas).
+"cache" construye o pone al día sus shards antes de medir: ninguna época decodifica.
+
+Uso: python benchmarks/bench_data_pipeline.py [--epochs 3] [--batch-size 64] [--data data/train] [--out data.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "ia"))
+
+from data_loader_images import load_dataset, PIPELINES
+
+DATA_TRAIN = ROOT / "data" / "train"
+DATA_TEST = ROOT / "data" / "test"
+
+
+def epoch_throughput(train, steps):
+    """Segundos e imágenes de una pasada completa (steps lotes) por el pipeline."""
+    it = iter(train)
+    images = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        x, _ = next(it)
+        images += int(x.shape[0])
+    return images, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--img-size", type=int, default=96)
+    parser.add_argument("--data", type=Path, default=DATA_TRAIN, help="carpeta con una subcarpeta por clase")
+    parser.add_argument("--pipelines", nargs="+", choices=PIPELINES, default=list(PIPELINES))
+    parser.add_argument("--out", type=Path, help="guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for pipeline in args.pipelines:
+        train, _, _ = load_dataset(str(args.data), str(DATA_TEST), img_size=(args.img_size, args.img_size),
+                                   batch_size=args.batch_size, pipeline=pipeline)
+        steps = -(-train.samples // args.batch_size)
+        epochs = []
+        for epoch in range(args.epochs):
+            images, seconds = epoch_throughput(train, steps)
+            epochs.append(round(images / seconds, 1))
+            print(f"{pipeline:10s} época {epoch + 1}: {images} imágenes en {seconds:.2f}s -> {images / seconds:,.0f} img/s")
+        results[pipeline] = {"images_per_epoch": train.samples, "images_per_second": epochs}
+
+    print("\npipeline    1ª época img/s   siguientes img/s")
+    for pipeline, r in results.items():
+        ips = r["images_per_second"]
+        rest = sum(ips[1:]) / len(ips[1:]) if len(ips) > 1 else float("nan")
+        print(f"{pipeline:10s}  {ips[0]:14,.0f}   {rest:16,.0f}")
+
+    if args.out:
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "cpus": os.cpu_count(),
+            "batch_size": args.batch_size,
+            "img_size": args.img_size,
+            **results,
+        }
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print("\nResultados guardados en", args.out)
+
+
+if __name__ == "__main__":
+    main()
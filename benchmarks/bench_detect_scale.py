@@ -0,0 +1,118 @@
+# benchmarks/bench_detect_scale.py
+"""
+Latencia vs. recall de la detección reducida (FACE_DETECT_MAX_SIDE).
+Para cada resolución de frame se compara la caja detectada con cada lado
+máximo contra la detección a resolución completa (max_side=0).
+
+Uso: python benchmarks/bench_detect_scale.py [--images carpeta] [--sides 0,640,480,320,240,160]
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import cv2
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from backend.inference.pipeline import extract_faces
+
+DEFAULT_IMAGES = ROOT / "app_desktop" / "views" / "pictures"
+RESOLUTIONS = [(320, 240), (640, 480), (1280, 720), (1920, 1080)]
+FACE_FRACTIONS = [0.35, 0.6, 0.9]  # alto del retrato respecto al frame
+
+
+def load_portraits(folder: Path):
+    portraits = []
+    for path in sorted(folder.glob("*.*")):
+        img = cv2.imread(str(path))
+        if img is not None:
+            portraits.append(img)
+    if not portraits:
+        raise SystemExit(f"No hay imágenes en {folder}")
+    return portraits
+
+
+def compose(portrait, size, fraction, rng):
+    w, h = size
+    canvas = np.full((h, w, 3), 90, np.uint8)
+    canvas[:] = np.linspace(60, 180, w, dtype=np.uint8)[None, :, None]
+    ph = max(16, int(h * fraction))
+    pw = max(16, int(portrait.shape[1] * ph / portrait.shape[0]))
+    pw = min(pw, w)
+    small = cv2.resize(portrait, (pw, ph), interpolation=cv2.INTER_AREA)
+    x = int(rng.integers(0, w - pw + 1))
+    y = int(rng.integers(0, h - ph + 1))
+    canvas[y:y + ph, x:x + pw] = small
+    return cv2.imencode(".jpg", canvas, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+def first_box(state):
+    return state["boxes"][0] if state["boxes"] else None
+
+
+def timed(frame, max_side, repeats):
+    extract_faces(frame, max_side=max_side)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        _, state = extract_faces(frame, max_side=max_side)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1e3, first_box(state)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=Path, default=DEFAULT_IMAGES)
+    parser.add_argument("--sides", default="0,640,480,320,240,160")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--out", type=Path, help="guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    sides = [int(s) for s in args.sides.split(",")]
+    portraits = load_portraits(args.images)
+    rng = np.random.default_rng(0)
+
+    results = []
+    for size in RESOLUTIONS:
+        frames = [compose(p, size, f, rng) for p in portraits for f in FACE_FRACTIONS]
+        reference = [first_box(extract_faces(fr, max_side=0)[1]) for fr in frames]
+        for side in sides:
+            latencies, hits, total = [], 0, 0
+            for frame, ref in zip(frames, reference):
+                ms, box = timed(frame, side, args.repeats)
+                latencies.append(ms)
+                if ref is not None:
+                    total += 1
+                    hits += int(box is not None and iou(box, ref) >= 0.5)
+            results.append({
+                "resolution": f"{size[0]}x{size[1]}",
+                "max_side": side,
+                "latency_ms_p50": round(float(np.median(latencies)), 2),
+                "recall_vs_full": round(hits / total, 3) if total else None,
+                "frames": len(frames),
+            })
+
+    print(f"{'resolución':>11s} {'max_side':>9s} {'p50 (ms)':>9s} {'recall':>7s}")
+    for r in results:
+        recall = "-" if r["recall_vs_full"] is None else f"{r['recall_vs_full']:.2f}"
+        print(f"{r['resolution']:>11s} {r['max_side']:9d} {r['latency_ms_p50']:9.2f} {recall:>7s}")
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print("Resultados guardados en", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# benchmarks/bench_pipeline.py
+"""
+Suite de rendimiento del camino de predicción (frame JPEG -> mensaje JSON).
+- latencia por etapa (decode, detect, preprocess, infer, serialize y total) en
+  p50/p95/p99 para cada resolución y número de rostros por frame
+- throughput del modelo (imágenes/s) con lotes de 1 a 64
+- RSS máximo del proceso
+Los frames son sintéticos: rostros de data/test (o los retratos de
+app_desktop/views/pictures si no hay data/) pegados sobre un fondo. Corre en CPU
+y sin red. Sin modelo entrenado usa la CNN de ia/model.py con pesos aleatorios.
+
+Uso: python benchmarks/bench_pipeline.py [--frames 20] [--out pipeline.json]
+     (el JSON incluye el commit, para comparar ejecuciones entre commits)
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import cv2
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "ia"))
+
+from backend.inference import runtime
+from backend.inference.pipeline import extract_faces
+from ia.preprocessing import PreprocessSpec
+
+DATA_TEST = ROOT / "data" / "test"
+PORTRAITS = ROOT / "app_desktop" / "views" / "pictures"
+RESOLUTIONS = [(320, 240), (640, 480), (1280, 720)]
+FACE_COUNTS = [1, 2, 4]
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64]
+STAGES = ["decode", "detect", "preprocess", "infer", "serialize", "total"]
+
+
+def load_faces(limit=16):
+    """Rostros de data/test si existe; si no, los retratos del frontend; si tampoco, óvalos sintéticos."""
+    paths = sorted(DATA_TEST.glob("*/*.*"))[::7][:limit] if DATA_TEST.exists() else []
+    source = "data/test"
+    if not paths:
+        paths = [p for p in sorted(PORTRAITS.glob("*.png")) if "ogo" not in p.name and "fondo" not in p.name]
+        source = "app_desktop/views/pictures"
+    faces = [img for img in (cv2.imread(str(p)) for p in paths) if img is not None]
+    if not faces:
+        source = "sintético"
+        for i in range(4):
+            face = np.full((96, 96, 3), 40 + 30 * i, np.uint8)
+            cv2.ellipse(face, (48, 48), (34, 44), 0, 0, 360, (170, 180, 200), -1)
+            faces.append(face)
+    return faces, source
+
+
+def compose(faces, size, count, rng):
+    """Frame JPEG de `size` con `count` rostros en una rejilla."""
+    w, h = size
+    canvas = np.empty((h, w, 3), np.uint8)
+    canvas[:] = np.linspace(60, 180, w, dtype=np.uint8)[None, :, None]
+    cols = int(np.ceil(np.sqrt(count)))
+    rows = int(np.ceil(count / cols))
+    cell = min(w // cols, h // rows)
+    side = int(cell * 0.8)
+    for i in range(count):
+        face = cv2.resize(faces[int(rng.integers(len(faces)))], (side, side), interpolation=cv2.INTER_AREA)
+        y = (i // cols) * cell + (cell - side) // 2
+        x = (i % cols) * cell + (cell - side) // 2
+        canvas[y:y + side, x:x + side] = face
+    return cv2.imencode(".jpg", canvas, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+
+
+def get_predictor(backend):
+    """Predictor del runtime (como en producción) o, sin modelo, la CNN con pesos aleatorios."""
+    if backend != "random":
+        runtime.INFERENCE_BACKEND = backend
+        try:
+            return runtime.load_predictor(), backend, runtime.preprocess_spec
+        except FileNotFoundError as e:
+            print(f"{e} -> se usa la CNN con pesos aleatorios")
+    from model import build_emotion_model
+    from backend.inference.serving import CompiledPredictor
+    predictor = CompiledPredictor(build_emotion_model(input_shape=(48, 48, 1), n_classes=7))
+    predictor.warmup()
+    return predictor, "random", PreprocessSpec(predictor.input_shape)
+
+
+def percentiles(values):
+    ms = np.asarray(values) * 1e3
+    return {
+        "p50": round(float(np.percentile(ms, 50)), 3),
+        "p95": round(float(np.percentile(ms, 95)), 3),
+        "p99": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def run_stage_latency(predictor, spec, faces, frames, repeats):
+    results = []
+    rng = np.random.default_rng(0)
+    for size in RESOLUTIONS:
+        for count in FACE_COUNTS:
+            corpus = [compose(faces, size, count, rng) for _ in range(frames)]
+            extract_faces(corpus[0], None, spec, max_faces=count)
+            samples = {stage: [] for stage in STAGES}
+            detected = []
+            for _ in range(repeats):
+                for jpeg in corpus:
+                    start = time.perf_counter()
+                    rois, state = extract_faces(jpeg, None, spec, max_faces=count)
+                    infer_start = time.perf_counter()
+                    preds = predictor(rois)
+                    serialize_start = time.perf_counter()
+                    faces_out = [
+                        {"box": list(box) if box else None, **runtime.decode_prediction(p)}
+                        for box, p in zip(state["boxes"] or [None], preds)
+                    ]
+                    json.dumps({"type": "prediction", **faces_out[0], "faces": faces_out})
+                    end = time.perf_counter()
+                    for stage in ("decode", "detect", "preprocess"):
+                        samples[stage].append(state["timings"][stage])
+                    samples["infer"].append(serialize_start - infer_start)
+                    samples["serialize"].append(end - serialize_start)
+                    samples["total"].append(end - start)
+                    detected.append(len(state["boxes"]))
+            results.append({
+                "resolution": f"{size[0]}x{size[1]}",
+                "faces": count,
+                "faces_detected_avg": round(float(np.mean(detected)), 2),
+                "latency_ms": {stage: percentiles(v) for stage, v in samples.items()},
+            })
+            total = results[-1]["latency_ms"]["total"]
+            print(f"  {results[-1]['resolution']:>9s} x{count} rostros: total p50 {total['p50']:.2f} ms, "
+                  f"p99 {total['p99']:.2f} ms")
+    return results
+
+
+def run_throughput(predictor, calls):
+    rng = np.random.default_rng(0)
+    results = []
+    for batch in BATCH_SIZES:
+        x = rng.random((batch, *predictor.input_shape), dtype=np.float32)
+        predictor(x)
+        start = time.perf_counter()
+        for _ in range(calls):
+            predictor(x)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "batch_size": batch,
+            "ms_per_batch": round(elapsed / calls * 1e3, 3),
+            "images_per_s": round(batch * calls / elapsed, 1),
+        })
+        print(f"  lote {batch:3d}: {results[-1]['images_per_s']:9.1f} img/s")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", default=os.getenv("INFERENCE_BACKEND", "keras"),
+                        help="keras / tflite_fp16 / tflite_int8 / random")
+    parser.add_argument("--frames", type=int, default=20, help="frames distintos por combinación")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--calls", type=int, default=20, help="llamadas por tamaño de lote")
+    parser.add_argument("--out", type=Path, help="guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    predictor, backend, spec = get_predictor(args.backend)
+    faces, source = load_faces()
+    print(f"Modelo: {backend} {predictor.input_shape} | rostros de {source} ({len(faces)})\n")
+
+    print("Latencia por etapa:")
+    stages = run_stage_latency(predictor, spec, faces, args.frames, args.repeats)
+    print("\nThroughput del modelo:")
+    throughput = run_throughput(predictor, args.calls)
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "backend": backend,
+        "input_shape": list(predictor.input_shape),
+        "preprocessing": spec.to_dict(),
+        "face_source": source,
+        "detect_max_side": int(os.getenv("FACE_DETECT_MAX_SIDE", "320")),
+        "stages": stages,
+        "throughput": throughput,
+        "peak_rss_mb": round(peak_rss_mb, 1),
+    }
+    print(f"\nRSS máximo: {report['peak_rss_mb']} MB")
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print("Resultados guardados en", args.out)
+
+
+if __name__ == "__main__":
+    main()
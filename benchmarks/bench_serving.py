@@ -0,0 +1,79 @@
+# benchmarks/bench_serving.py
+"""
+Latencia por llamada: `model.predict` vs. CompiledPredictor (funciones de forma
+fija por bucket). Usa ia/models/best_model.keras si existe; si no, la CNN de
+ia/model.py con pesos aleatorios (la latencia no depende de los pesos).
+
+Uso: python benchmarks/bench_serving.py [--batches 1,2,4,8,16] [--calls 50]
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "ia"))
+
+from tensorflow.keras.models import load_model
+from backend.inference.serving import CompiledPredictor
+
+MODEL_PATH = ROOT / "ia" / "models" / "best_model.keras"
+
+
+def get_model():
+    if MODEL_PATH.exists():
+        return load_model(str(MODEL_PATH), compile=False), str(MODEL_PATH.name)
+    from model import build_emotion_model
+    return build_emotion_model(input_shape=(48, 48, 1), n_classes=7), "emotion_cnn (aleatorio)"
+
+
+def per_call_ms(fn, x, calls):
+    fn(x)
+    times = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn(x)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1e3, float(np.percentile(times, 95)) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batches", default="1,2,3,4,8,16")
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--out", type=Path, help="guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    model, name = get_model()
+    start = time.perf_counter()
+    predictor = CompiledPredictor(model)
+    predictor.warmup()
+    warmup_s = time.perf_counter() - start
+    print(f"Modelo: {name} {predictor.input_shape} | buckets {predictor.buckets} | trazado+warm-up {warmup_s:.2f}s\n")
+
+    rng = np.random.default_rng(0)
+    results = []
+    print(f"{'lote':>5s} {'predict p50':>12s} {'p95':>8s} {'compilado p50':>14s} {'p95':>8s} {'speed-up':>9s}")
+    for n in [int(b) for b in args.batches.split(",")]:
+        x = rng.random((n, *predictor.input_shape), dtype=np.float32)
+        keras_p50, keras_p95 = per_call_ms(lambda v: model.predict(v, verbose=0), x, args.calls)
+        comp_p50, comp_p95 = per_call_ms(predictor, x, args.calls)
+        np.testing.assert_allclose(model.predict(x, verbose=0), predictor(x), rtol=1e-4, atol=1e-5)
+        results.append({
+            "batch": n,
+            "predict_ms_p50": round(keras_p50, 3), "predict_ms_p95": round(keras_p95, 3),
+            "compiled_ms_p50": round(comp_p50, 3), "compiled_ms_p95": round(comp_p95, 3),
+        })
+        print(f"{n:5d} {keras_p50:12.2f} {keras_p95:8.2f} {comp_p50:14.2f} {comp_p95:8.2f} {keras_p50 / comp_p50:8.1f}x")
+
+    if args.out:
+        args.out.write_text(json.dumps({"model": name, "results": results}, indent=2), encoding="utf-8")
+        print("Resultados guardados en", args.out)
+
+
+if __name__ == "__main__":
+    main()
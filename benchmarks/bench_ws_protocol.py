@@ -0,0 +1,102 @@
+# benchmarks/bench_ws_protocol.py
+"""
+Compara los dos modos de /ws/predict: JSON con data URL base64 vs binario
+(cabecera fija + JPEG crudo). Mide bytes en el cable y CPU del servidor por
+frame hasta tener la imagen decodificada.
+
+Uso: python benchmarks/bench_ws_protocol.py [imagen.jpg] [--frames 500]
+"""
+import sys
+import json
+import time
+import base64
+import argparse
+from pathlib import Path
+
+import numpy as np
+import cv2
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from backend.inference.protocol import pack_binary_frame, parse_binary_frame, parse_text_frame, frame_to_jpeg
+
+
+def synthetic_frame(width=320, height=240):
+    # Degradado + rostro simple: comprime como una webcam, no como ruido
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    img = np.dstack([(x + y) / 2, np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width))])
+    img = img.astype(np.uint8)
+    cv2.ellipse(img, (width // 2, height // 2), (width // 6, height // 4), 0, 0, 360, (180, 160, 150), -1)
+    return img
+
+
+def load_jpeg(path, quality=60):
+    if path:
+        img = cv2.imread(str(path))
+        if img is None:
+            raise SystemExit(f"No se pudo leer la imagen: {path}")
+        img = cv2.resize(img, (320, 240))
+    else:
+        img = synthetic_frame()
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes()
+
+
+def server_json(message: str):
+    _, frame = parse_text_frame(message)
+    jpeg = frame_to_jpeg(frame)
+    return cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def server_binary(message: bytes):
+    _, frame = parse_binary_frame(message)
+    jpeg = frame_to_jpeg(frame)
+    return cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def cpu_per_frame(fn, message, frames):
+    fn(message)  # calentamiento
+    start = time.process_time()
+    for _ in range(frames):
+        fn(message)
+    return (time.process_time() - start) / frames * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("image", nargs="?", help="JPEG de ejemplo (por defecto uno sintético 320x240)")
+    parser.add_argument("--frames", type=int, default=500)
+    args = parser.parse_args()
+
+    jpeg = load_jpeg(args.image)
+    json_msg = json.dumps({"type": "frame", "data": "data:image/jpeg;base64," + base64.b64encode(jpeg).decode()})
+    bin_msg = pack_binary_frame(jpeg, seq=1)
+
+    results = {
+        "jpeg_bytes": len(jpeg),
+        "json": {
+            "wire_bytes": len(json_msg.encode()),
+            "parse_us": cpu_per_frame(lambda m: frame_to_jpeg(parse_text_frame(m)[1]), json_msg, args.frames),
+            "parse_decode_us": cpu_per_frame(server_json, json_msg, args.frames),
+        },
+        "binary": {
+            "wire_bytes": len(bin_msg),
+            "parse_us": cpu_per_frame(lambda m: frame_to_jpeg(parse_binary_frame(m)[1]), bin_msg, args.frames),
+            "parse_decode_us": cpu_per_frame(server_binary, bin_msg, args.frames),
+        },
+    }
+
+    print(f"JPEG: {results['jpeg_bytes']} bytes, {args.frames} frames\n")
+    print(f"{'modo':8s} {'bytes cable':>12s} {'parseo (µs)':>12s} {'parseo+decode (µs)':>20s}")
+    for mode in ("json", "binary"):
+        r = results[mode]
+        print(f"{mode:8s} {r['wire_bytes']:12d} {r['parse_us']:12.1f} {r['parse_decode_us']:20.1f}")
+    overhead = results["json"]["wire_bytes"] / results["binary"]["wire_bytes"] - 1
+    print(f"\nSobrecoste en cable del modo JSON: {overhead * 100:.1f}%")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
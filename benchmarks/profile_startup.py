@@ -0,0 +1,97 @@
+# benchmarks/profile_startup.py
+"""
+Perfil de arranque del backend: coste de importar cada módulo y del primer
+arranque del subsistema de predicción. Cada medida corre en un proceso nuevo.
+- import de backend.main (con -X importtime): tiempo, RSS y si TensorFlow se cargó
+- import de backend.auth (lo que pagan scripts como seed_users.py)
+- carga + warm-up del modelo (runtime.load_predictor)
+
+Uso: python benchmarks/profile_startup.py [--top 15] [--out startup_profile.json]
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+PROBE = r"""
+import sys, time, json, resource
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": round(elapsed, 3),
+    "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    "tensorflow_loaded": "tensorflow" in sys.modules,
+}}))
+"""
+
+STEPS = {
+    "import backend.auth": "import backend.auth",
+    "import backend.main": "import backend.main",
+    "load predictor": "import backend.main\nfrom backend.inference import runtime\nruntime.load_predictor()",
+}
+
+
+def run_probe(code, importtime=False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", PROBE.format(code=code)]
+    env = {**os.environ, "PYTHONPATH": str(ROOT), "TF_CPP_MIN_LOG_LEVEL": "3"}
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"Falló `{code}`:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result, proc.stderr
+
+
+def parse_importtime(stderr, top):
+    """Tiempo propio (self) de importación sumado por paquete raíz: fastapi, cv2, numpy..."""
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line.split(":", 1)[1].split("|")
+        if len(parts) != 3:
+            continue
+        root = parts[2].strip().split(".")[0]
+        totals[root] = totals.get(root, 0) + int(parts[0].strip())
+    ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return [{"package": m, "self_ms": round(us / 1000, 1)} for m, us in ranked]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--skip-model", action="store_true", help="no medir la carga del modelo")
+    parser.add_argument("--out", type=Path, help="guardar el informe en JSON")
+    args = parser.parse_args()
+
+    report = {"steps": {}, "imports": []}
+    for name, code in STEPS.items():
+        if args.skip_model and name == "load predictor":
+            continue
+        importtime = name == "import backend.main"
+        result, stderr = run_probe(code, importtime=importtime)
+        report["steps"][name] = result
+        if importtime:
+            report["imports"] = parse_importtime(stderr, args.top)
+
+    print(f"{'paso':22s} {'segundos':>9s} {'RSS (MB)':>9s} {'TensorFlow':>11s}")
+    for name, r in report["steps"].items():
+        print(f"{name:22s} {r['seconds']:9.2f} {r['max_rss_mb']:9.1f} {str(r['tensorflow_loaded']):>11s}")
+    print(f"\nPaquetes más caros al importar backend.main (top {args.top}):")
+    for item in report["imports"]:
+        print(f"  {item['package']:30s} {item['self_ms']:9.1f} ms")
+
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print("\nInforme guardado en", args.out)
+
+
+if __name__ == "__main__":
+    main()
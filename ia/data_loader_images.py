@@ -1,7 +1,47 @@
 # ia/data_loader_images.py
+"""
+Carga data/train y data/test para entrenar. Tres implementaciones con la misma
+interfaz (lo que usan train_images.py y distill.py):
+
+- "generator": ImageDataGenerator de Keras, la de siempre (un hilo de Python
+  decodifica y aumenta imagen por imagen)
+- "tfdata": tf.data con decodificación en paralelo, cache() de las imágenes ya
+  redimensionadas, aumento vectorizado por lote y prefetch
+- "cache": los shards .npy ya preprocesados de ia/dataset_cache.py (mmap), sin
+  decodificar nada; se ponen al día solos si cambian las imágenes
+
+Mismo reparto train/validación (el 20% primero de cada clase, por nombre de
+archivo, es validación), mismo class_indices (carpetas en orden alfabético) y
+mismo preprocesado (resize "nearest", samplewise). Los tres devuelven objetos con
+.classes, .class_indices, .image_shape y .samples.
+
+Uso: load_dataset(train_dir, test_dir, pipeline="tfdata")  (o DATA_PIPELINE=tfdata; por defecto "generator")
+"""
+import os
+import math
+
+import numpy as np
+import tensorflow as tf
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 
-def load_dataset(train_dir, test_dir, img_size=(96,96), batch_size=64):
+from preprocessing import PreprocessSpec
+from dataset_cache import VALIDATION_SPLIT, list_image_files, load_split
+
+DATA_PIPELINE = os.getenv("DATA_PIPELINE", "generator")
+PIPELINES = ("generator", "tfdata", "cache")
+
+
+def load_dataset(train_dir, test_dir, img_size=(96,96), batch_size=64, pipeline=DATA_PIPELINE):
+    if pipeline == "generator":
+        return load_dataset_generator(train_dir, test_dir, img_size, batch_size)
+    if pipeline == "tfdata":
+        return load_dataset_tf(train_dir, test_dir, img_size, batch_size)
+    if pipeline == "cache":
+        return load_dataset_cached(train_dir, test_dir, img_size, batch_size)
+    raise ValueError(f"❌ Pipeline de datos desconocido: {pipeline} (usa {', '.join(PIPELINES)})")
+
+
+def load_dataset_generator(train_dir, test_dir, img_size=(96,96), batch_size=64):
     train_datagen = ImageDataGenerator(
         rescale=1./255,
         samplewise_center=True,
@@ -13,7 +53,7 @@ def load_dataset(train_dir, test_dir, img_size=(96,96), batch_size=64):
         zoom_range=0.3,
         horizontal_flip=True,
         brightness_range=[0.6, 1.4],
-        validation_split=0.2
+        validation_split=VALIDATION_SPLIT
     )
 
     test_datagen = ImageDataGenerator(
@@ -50,3 +90,180 @@ def load_dataset(train_dir, test_dir, img_size=(96,96), batch_size=64):
     )
 
     return train_generator, val_generator, test_generator
+
+
+# ========================
+# ⚡ tf.data
+# ========================
+def random_affine(x, seed=None):
+    """
+    La parte geométrica de los aumentos de load_dataset_generator sobre un lote entero:
+    rotación ±45°, desplazamiento ±30%, shear ±0.25° (ImageDataGenerator lo da en
+    grados), zoom 0.7-1.3 por eje y volteo horizontal se juntan en una sola matriz
+    afín por imagen y se aplican con una única transformación (bilineal, bordes
+    "nearest"). Una capa de Keras por aumento remuestrea el lote cuatro veces y va
+    unas cuatro veces más lento en CPU.
+    """
+    shape = tf.shape(x)
+    b = shape[0]
+    h, w = tf.cast(shape[1], tf.float32), tf.cast(shape[2], tf.float32)
+
+    def uniform(low, high):
+        return tf.random.uniform((b,), low, high, seed=seed)
+
+    theta = uniform(-math.radians(45), math.radians(45))
+    shear = uniform(-math.radians(0.25), math.radians(0.25))
+    zx, zy = uniform(0.7, 1.3), uniform(0.7, 1.3)
+    tx, ty = uniform(-0.3, 0.3) * w, uniform(-0.3, 0.3) * h
+    flip = tf.where(uniform(0.0, 1.0) < 0.5, -1.0, 1.0)
+
+    # Matriz salida -> entrada alrededor del centro: rotación · shear · zoom · volteo
+    cos, sin = tf.cos(theta), tf.sin(theta)
+    a00 = cos * zx * flip
+    a01 = (-cos * tf.sin(shear) - sin * tf.cos(shear)) * zy
+    a10 = sin * zx * flip
+    a11 = (-sin * tf.sin(shear) + cos * tf.cos(shear)) * zy
+    cx, cy = (w - 1) / 2, (h - 1) / 2
+    a02 = cx - a00 * cx - a01 * cy + tx
+    a12 = cy - a10 * cx - a11 * cy + ty
+    zeros = tf.zeros_like(a00)
+    transforms = tf.stack([a00, a01, a02, a10, a11, a12, zeros, zeros], axis=1)
+
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=x, transforms=transforms, output_shape=shape[1:3], fill_value=0.0,
+        interpolation="BILINEAR", fill_mode="NEAREST",
+    )
+
+
+def augment_batch(x, seed=None):
+    """Los aumentos de load_dataset_generator sobre un lote (B, H, W, C) float 0..255."""
+    x = random_affine(x, seed)
+    b = tf.shape(x)[0]
+    # brightness_range=[0.6, 1.4]: factor por imagen, recortado a 0..255 como PIL
+    factor = tf.random.uniform((b, 1, 1, 1), 0.6, 1.4, seed=seed)
+    return tf.clip_by_value(x * factor, 0.0, 255.0)
+
+
+def samplewise(x):
+    x = x - tf.reduce_mean(x, axis=(1, 2, 3), keepdims=True)
+    return x / (tf.math.reduce_std(x, axis=(1, 2, 3), keepdims=True) + 1e-6)
+
+
+def _with_interface(ds, labels, class_indices, paths, image_shape):
+    """La interfaz de DirectoryIterator que usan train_images.py y distill.py."""
+    ds.classes = labels
+    ds.class_indices = class_indices
+    ds.filepaths = paths
+    ds.samples = len(paths)
+    ds.image_shape = image_shape
+    print(f"Found {len(paths)} images belonging to {len(class_indices)} classes.")
+    return ds
+
+
+def _directory_dataset(directory, img_size, batch_size, subset=None, augment=False, shuffle=True,
+                       cache="", seed=None):
+    paths, labels, class_indices = list_image_files(directory, subset)
+    n_classes = len(class_indices)
+
+    def decode(path, label):
+        raw = tf.io.read_file(path)
+        # JPEG con la DCT exacta: los mismos píxeles que PIL (la rápida por defecto se aleja hasta 17 niveles)
+        image = tf.cond(
+            tf.io.is_jpeg(raw),
+            lambda: tf.io.decode_jpeg(raw, channels=3, dct_method="INTEGER_ACCURATE"),
+            lambda: tf.io.decode_image(raw, channels=3, expand_animations=False),
+        )
+        # Mismo resize que load_img de Keras ("nearest"); se guarda en uint8 para que la cache ocupe poco
+        image = tf.image.resize(image, img_size, method="nearest")
+        image.set_shape((*img_size, 3))
+        return image, label
+
+    def finish(images, label):
+        x = tf.cast(images, tf.float32)
+        if augment:
+            x = augment_batch(x, seed)
+        # rescale + samplewise_center + samplewise_std_normalization
+        return samplewise(x / 255.0), tf.one_hot(label, n_classes)
+
+    ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+    ds = ds.map(decode, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+    ds = ds.cache(cache)
+    if shuffle:
+        ds = ds.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    ds = ds.map(finish, num_parallel_calls=tf.data.AUTOTUNE)
+    ds = ds.prefetch(tf.data.AUTOTUNE)
+
+    return _with_interface(ds, labels, class_indices, paths, (*img_size, 3))
+
+
+def load_dataset_tf(train_dir, test_dir, img_size=(96,96), batch_size=64, cache_dir="", seed=None):
+    """
+    Igual que load_dataset_generator con tf.data. cache_dir vacío: cache en memoria
+    (basta para FER2013 a 96x96 en uint8); con un directorio, cache en disco.
+    La validación no se aumenta (ImageDataGenerator sí lo hacía al compartir el generador).
+    """
+    img_size = tuple(img_size)
+
+    def cache_file(name):
+        if not cache_dir:
+            return ""
+        os.makedirs(cache_dir, exist_ok=True)
+        return os.path.join(cache_dir, f"{name}_{img_size[0]}x{img_size[1]}")
+
+    train_ds = _directory_dataset(train_dir, img_size, batch_size, subset="training", augment=True,
+                                  cache=cache_file("train"), seed=seed)
+    val_ds = _directory_dataset(train_dir, img_size, batch_size, subset="validation",
+                                cache=cache_file("validation"), seed=seed)
+    test_ds = _directory_dataset(test_dir, img_size, batch_size, shuffle=False, cache=cache_file("test"))
+    return train_ds, val_ds, test_ds
+
+
+# ========================
+# 💾 Shards preprocesados (ia/dataset_cache.py)
+# ========================
+def _cached_dataset(split, indices, batch_size, augment=False, shuffle=True, seed=None):
+    n_classes = len(split.class_indices)
+    labels = split.labels[indices]
+    rng = np.random.default_rng(seed)
+
+    def batches():
+        order = rng.permutation(indices) if shuffle else indices
+        for i in range(0, len(order), batch_size):
+            rows = order[i:i + batch_size]
+            # Ordenadas por fila, la lectura del mmap va casi secuencial dentro de cada shard
+            rows.sort()
+            yield split.take(rows), split.labels[rows]
+
+    def finish(x, label):
+        if augment:
+            # Los shards ya están normalizados: el brillo no cambia nada tras samplewise,
+            # así que solo la parte geométrica, y se vuelve a normalizar por el relleno de bordes
+            x = samplewise(random_affine(x, seed))
+        return x, tf.one_hot(label, n_classes)
+
+    ds = tf.data.Dataset.from_generator(batches, output_signature=(
+        tf.TensorSpec((None, *split.spec.input_shape), tf.float32),
+        tf.TensorSpec((None,), tf.int32),
+    ))
+    ds = ds.map(finish, num_parallel_calls=tf.data.AUTOTUNE)
+    ds = ds.prefetch(tf.data.AUTOTUNE)
+    return _with_interface(ds, labels, split.class_indices, [str(split.paths[i]) for i in indices],
+                           split.spec.input_shape)
+
+
+def load_dataset_cached(train_dir, test_dir, img_size=(96,96), batch_size=64, seed=None):
+    """
+    Igual que load_dataset_tf pero leyendo los shards de ia/dataset_cache.py, que se
+    construyen (o se ponen al día) aquí mismo con la especificación de entrenamiento.
+    """
+    spec = PreprocessSpec(input_shape=(*img_size, 3), color_mode="rgb",
+                          normalization="samplewise", interpolation="nearest")
+    train = load_split("train", train_dir, spec)
+    test = load_split("test", test_dir, spec)
+    train_idx, val_idx = train.subset()
+    return (
+        _cached_dataset(train, train_idx, batch_size, augment=True, seed=seed),
+        _cached_dataset(train, val_idx, batch_size, seed=seed),
+        _cached_dataset(test, np.arange(len(test)), batch_size, shuffle=False),
+    )
@@ -0,0 +1,240 @@
+# ia/dataset_cache.py
+"""
+Cache del dataset ya preprocesado: data/train y data/test redimensionados y
+normalizados con un PreprocessSpec, en shards .npy que los scripts de ia/ abren
+con np.load(mmap_mode="r") (sin decodificar un JPEG ni copiar el dataset a RAM).
+
+    data/cache/
+        96x96x3-rgb-samplewise-nearest/     <- un directorio por especificación
+            manifest.json                   <- spec + shards: clase, rutas de origen, huella
+            train-angry-000.npy             <- (N, 96, 96, 3) float32, hasta DATASET_SHARD_SIZE
+            test-angry-000.npy
+            ...
+
+Cada shard guarda una huella de sus imágenes de origen (ruta, tamaño, mtime) y de
+la especificación: build() solo reescribe los shards cuya huella cambió, así que
+volver a llamarlo con el dataset intacto solo hace un stat() por imagen.
+Los directorios de especificaciones que ya no se usan no se borran solos: "clean"
+deja solo el de la especificación indicada.
+
+Uso: python ia/dataset_cache.py build [--model ia/models/best_model.keras] [--split train test]
+     python ia/dataset_cache.py clean [--model ia/models/best_model.keras]
+     (sin metadatos del modelo, la especificación de train_images.py: 96x96 RGB samplewise)
+"""
+import os
+import json
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from preprocessing import PreprocessSpec, load_images
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "data"
+DATASET_CACHE_DIR = Path(os.getenv("DATASET_CACHE_DIR", str(DATA_DIR / "cache")))
+DATASET_SHARD_SIZE = int(os.getenv("DATASET_SHARD_SIZE", "2048"))
+MANIFEST = "manifest.json"
+VALIDATION_SPLIT = 0.2
+# Lo que acepta tf.io.decode_image (ImageDataGenerator también lee ppm/tif)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+# La entrada con la que train_images.py entrena MobileNetV2
+TRAINING_SPEC = PreprocessSpec(input_shape=(96, 96, 3), color_mode="rgb",
+                               normalization="samplewise", interpolation="nearest")
+
+
+def list_image_files(directory, subset=None, validation_split=VALIDATION_SPLIT):
+    """
+    Rutas y etiquetas como flow_from_directory: clases = subcarpetas en orden
+    alfabético, archivos ordenados, y con subset el mismo corte por clase
+    ('validation' = el primer validation_split de cada carpeta, 'training' = el resto).
+    """
+    classes = sorted(d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d)))
+    class_indices = {name: i for i, name in enumerate(classes)}
+    paths, labels = [], []
+    for name in classes:
+        files = []
+        for root, _, names in sorted(os.walk(os.path.join(directory, name)), key=lambda x: x[0]):
+            files += [os.path.join(root, f) for f in sorted(names) if f.lower().endswith(IMAGE_EXTENSIONS)]
+        if subset:
+            cut = int(validation_split * len(files))
+            files = files[:cut] if subset == "validation" else files[cut:]
+        paths += files
+        labels += [class_indices[name]] * len(files)
+    return paths, np.array(labels, dtype=np.int32), class_indices
+
+
+def spec_key(spec: PreprocessSpec) -> str:
+    """Nombre del directorio de una especificación (las clases no cambian los píxeles)."""
+    return "x".join(str(v) for v in spec.input_shape) + f"-{spec.color_mode}-{spec.normalization}-{spec.interpolation}"
+
+
+def _pixel_spec(spec: PreprocessSpec) -> dict:
+    return {k: v for k, v in spec.to_dict().items() if k != "class_names"}
+
+
+def _fingerprint(spec: PreprocessSpec, paths) -> str:
+    h = hashlib.sha1(json.dumps(_pixel_spec(spec), sort_keys=True).encode())
+    for p in paths:
+        st = os.stat(p)
+        h.update(f"{os.path.relpath(p, ROOT)}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def _read_manifest(directory: Path) -> dict:
+    path = directory / MANIFEST
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_atomic(path: Path, write):
+    tmp = path.with_name("." + path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _save_npy(path: Path, x: np.ndarray):
+    # Con un archivo abierto np.save no le añade ".npy" al nombre temporal
+    with open(path, "wb") as f:
+        np.save(f, x)
+
+
+def build(split: str, source_dir, spec: PreprocessSpec = TRAINING_SPEC,
+          cache_dir: Path = DATASET_CACHE_DIR, shard_size: int = DATASET_SHARD_SIZE, verbose=True) -> dict:
+    """Preprocesa source_dir (una subcarpeta por clase) en shards; devuelve la entrada del manifest."""
+    directory = Path(cache_dir) / spec_key(spec)
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = _read_manifest(directory)
+    old = {s["file"]: s for s in manifest.get("splits", {}).get(split, {}).get("shards", [])}
+
+    paths, labels, class_indices = list_image_files(source_dir)
+    shards, built, reused = [], 0, 0
+    for name, label in class_indices.items():
+        class_paths = [p for p, l in zip(paths, labels) if l == label]
+        for i, start in enumerate(range(0, len(class_paths), shard_size)):
+            chunk = class_paths[start:start + shard_size]
+            entry = {"file": f"{split}-{name}-{i:03d}.npy", "class": name, "label": label,
+                     "fingerprint": _fingerprint(spec, chunk)}
+            previous = old.get(entry["file"])
+            if previous and previous["fingerprint"] == entry["fingerprint"] and (directory / entry["file"]).exists():
+                shards.append(previous)
+                reused += 1
+                continue
+            x, ok = load_images(chunk, spec)
+            _write_atomic(directory / entry["file"], lambda tmp: _save_npy(tmp, x))
+            # Las ilegibles se saltan (como load_images): el manifest lista solo las que están en el shard
+            entry["paths"] = [os.path.relpath(p, ROOT) for p in ok]
+            entry["skipped"] = len(chunk) - len(ok)
+            shards.append(entry)
+            built += 1
+
+    # Shards de clases o trozos que ya no existen
+    for stale in set(old) - {s["file"] for s in shards}:
+        (directory / stale).unlink(missing_ok=True)
+
+    manifest["spec"] = _pixel_spec(spec)
+    manifest.setdefault("splits", {})[split] = {
+        "source": os.path.relpath(source_dir, ROOT),
+        "class_indices": class_indices,
+        "shards": shards,
+    }
+    _write_atomic(directory / MANIFEST, lambda tmp: tmp.write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8"))
+    if verbose:
+        count = sum(len(s["paths"]) for s in shards)
+        print(f"💾 {split}: {count} imágenes en {len(shards)} shards ({built} reconstruidos, {reused} al día) -> {directory}")
+    return manifest["splits"][split]
+
+
+class CachedSplit:
+    """Un split de la cache abierto en modo mmap: los lotes son vistas de los shards, sin copias."""
+
+    def __init__(self, directory: Path, entry: dict, spec: PreprocessSpec):
+        self.spec = spec
+        self.class_indices = entry["class_indices"]
+        self.class_names = [k for k, v in sorted(self.class_indices.items(), key=lambda x: x[1])]
+        self.shards = [np.load(directory / s["file"], mmap_mode="r") for s in entry["shards"]]
+        self.paths = [ROOT / p for s in entry["shards"] for p in s["paths"]]
+        self.labels = np.concatenate(
+            [np.full(len(s["paths"]), s["label"], dtype=np.int32) for s in entry["shards"]]
+        ) if entry["shards"] else np.empty(0, dtype=np.int32)
+        self._offsets = np.cumsum([0] + [len(x) for x in self.shards])
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def batches(self, batch_size):
+        """(x, etiquetas, rutas) en orden; un lote nunca cruza dos shards para seguir siendo una vista."""
+        for shard, start in zip(self.shards, self._offsets):
+            for i in range(0, len(shard), batch_size):
+                end = min(i + batch_size, len(shard))
+                yield shard[i:end], self.labels[start + i:start + end], self.paths[start + i:start + end]
+
+    def take(self, indices) -> np.ndarray:
+        """Copia solo las filas pedidas (índices globales, en el orden dado)."""
+        indices = np.asarray(indices)
+        shard_of = np.searchsorted(self._offsets, indices, side="right") - 1
+        out = np.empty((len(indices), *self.spec.input_shape), dtype=np.float32)
+        for s in np.unique(shard_of):
+            rows = shard_of == s
+            out[rows] = self.shards[s][indices[rows] - self._offsets[s]]
+        return out
+
+    def subset(self, validation_split=VALIDATION_SPLIT):
+        """Índices (training, validation) con el corte de flow_from_directory: el primer 20% de cada clase valida."""
+        train, val = [], []
+        for label in np.unique(self.labels):
+            rows = np.flatnonzero(self.labels == label)
+            cut = int(validation_split * len(rows))
+            val.append(rows[:cut])
+            train.append(rows[cut:])
+        return np.concatenate(train), np.concatenate(val)
+
+
+def load_split(split: str, source_dir=None, spec: PreprocessSpec = TRAINING_SPEC,
+               cache_dir: Path = DATASET_CACHE_DIR) -> CachedSplit:
+    """Pone al día el split (si cambió algo) y lo abre. source_dir por defecto: data/<split>."""
+    source_dir = source_dir or DATA_DIR / split
+    entry = build(split, source_dir, spec, cache_dir)
+    return CachedSplit(Path(cache_dir) / spec_key(spec), entry, spec)
+
+
+def clean(keep: PreprocessSpec = TRAINING_SPEC, cache_dir: Path = DATASET_CACHE_DIR, verbose=True) -> list:
+    """Borra los directorios de otras especificaciones (solo los que tienen manifest). Devuelve los borrados."""
+    cache_dir = Path(cache_dir)
+    if not cache_dir.is_dir():
+        return []
+    removed = []
+    for directory in sorted(cache_dir.iterdir()):
+        if directory.name != spec_key(keep) and (directory / MANIFEST).exists():
+            shutil.rmtree(directory)
+            removed.append(directory)
+            if verbose:
+                print(f"🗑️ Borrado {directory}")
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache de data/ preprocesado en shards .npy")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build")
+    b.add_argument("--model", type=Path, help="usar la especificación de este modelo (su .meta.json)")
+    b.add_argument("--split", nargs="+", default=["train", "test"])
+    c = sub.add_parser("clean", help="borrar los directorios de otras especificaciones")
+    c.add_argument("--model", type=Path, help="conservar la especificación de este modelo (su .meta.json)")
+    args = parser.parse_args()
+
+    spec = PreprocessSpec.load(args.model, default=TRAINING_SPEC) if args.model else TRAINING_SPEC
+    if args.command == "clean":
+        clean(spec)
+        return
+    for split in args.split:
+        build(split, DATA_DIR / split, spec)
+
+
+if __name__ == "__main__":
+    main()
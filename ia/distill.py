@@ -0,0 +1,164 @@
+# ia/distill.py
+"""
+Destilación: entrena una CNN pequeña (model.build_emotion_model con width < 1, en
+gris a 48x48) para imitar las probabilidades del modelo grande ya entrenado
+(best_model.keras, MobileNetV2 96x96 RGB). La usa train_images.py --distill.
+
+pérdida = alpha * CE(etiqueta, estudiante) + (1 - alpha) * T² * KL(profesor_T || estudiante_T)
+con las dos distribuciones suavizadas por la temperatura T.
+
+El estudiante se exporta con la misma estructura que carga el backend
+(best_model.keras + best_model.meta.json + class_indices.json) en su propio
+directorio, para publicarlo en el registro:
+    python -m backend.inference.registry publish --source ia/models/student
+"""
+import os
+import json
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers, ops
+from tensorflow.keras.models import load_model
+from tensorflow.keras.optimizers import Adam
+from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
+
+from model import build_emotion_model
+from preprocessing import PreprocessSpec
+
+# Coeficientes de cv2.COLOR_BGR2GRAY en orden RGB (el generador entrega RGB)
+RGB_TO_GRAY = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def student_input_adapter(input_shape, student_shape):
+    """
+    Lleva el lote del generador (96x96 RGB, samplewise) a lo que verá el estudiante
+    en producción (48x48 gris, samplewise). Gris y resize son lineales, así que
+    normalizar de nuevo por muestra da lo mismo que hacerlo sobre el gris original.
+    """
+    i = layers.Input(shape=input_shape)
+    x = layers.Resizing(student_shape[0], student_shape[1], interpolation="bilinear")(i)
+    x = layers.Lambda(lambda t: ops.sum(t * RGB_TO_GRAY, axis=-1, keepdims=True))(x)
+    x = layers.Lambda(lambda t: (t - ops.mean(t, axis=(1, 2, 3), keepdims=True))
+                      / (ops.std(t, axis=(1, 2, 3), keepdims=True) + 1e-6))(x)
+    return keras.Model(i, x, name="student_input")
+
+
+class Distiller(keras.Model):
+    """Envuelve al estudiante; fit() optimiza la pérdida combinada y el profesor queda congelado."""
+
+    def __init__(self, student, teacher, adapter, temperature=4.0, alpha=0.1):
+        super().__init__()
+        self.student = student
+        self.teacher = teacher
+        self.adapter = adapter
+        self.teacher.trainable = False
+        self.temperature = temperature
+        self.alpha = alpha
+        self.hard_loss = keras.losses.CategoricalCrossentropy()
+        self.soft_loss = keras.losses.KLDivergence()
+
+    def call(self, x, training=False):
+        return self.student(self.adapter(x), training=training)
+
+    def _soften(self, probs):
+        # Los dos modelos terminan en softmax: log(p) hace de logits
+        return ops.softmax(ops.log(probs + 1e-7) / self.temperature)
+
+    def compute_loss(self, x=None, y=None, y_pred=None, sample_weight=None, training=True):
+        teacher_probs = self.teacher(x, training=False)
+        hard = self.hard_loss(y, y_pred, sample_weight=sample_weight)
+        soft = self.soft_loss(self._soften(teacher_probs), self._soften(y_pred)) * self.temperature ** 2
+        return self.alpha * hard + (1 - self.alpha) * soft
+
+
+def cpu_latency_ms(model, input_shape, runs=50):
+    """Mediana en ms de una imagen suelta (lote de 1), con la función ya trazada."""
+    fn = tf.function(lambda x: model(x, training=False))
+    x = tf.zeros((1, *input_shape), tf.float32)
+    for _ in range(5):
+        fn(x)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(x).numpy()
+        times.append(time.perf_counter() - start)
+    return round(float(np.median(times)) * 1e3, 3)
+
+
+def run_distillation(train_gen, val_gen, test_gen, class_weights, teacher_path, out_dir,
+                     width=0.5, student_size=48, temperature=4.0, alpha=0.1, epochs=100):
+    teacher = load_model(teacher_path, compile=False)
+    teacher_shape = tuple(teacher.input_shape[1:])
+    if teacher_shape != tuple(train_gen.image_shape):
+        raise ValueError(f"❌ El profesor espera {teacher_shape} y load_dataset entrega {train_gen.image_shape}")
+    student_shape = (student_size, student_size, 1)
+    n_classes = teacher.output_shape[-1]
+
+    student = build_emotion_model(input_shape=student_shape, n_classes=n_classes, width=width)
+    distiller = Distiller(student, teacher, student_input_adapter(teacher_shape, student_shape),
+                          temperature=temperature, alpha=alpha)
+    distiller.compile(optimizer=Adam(1e-3), metrics=['accuracy'])
+
+    print(f"▶ Destilando {os.path.basename(teacher_path)} -> CNN width={width} "
+          f"{student_shape} (T={temperature}, alpha={alpha})")
+    history = distiller.fit(
+        train_gen,
+        validation_data=val_gen,
+        epochs=epochs,
+        callbacks=[
+            EarlyStopping(monitor='val_accuracy', patience=10, restore_best_weights=True),
+            ReduceLROnPlateau(factor=0.5, patience=4, min_lr=1e-6),
+        ],
+        class_weight=class_weights,
+    )
+
+    # Profesor y estudiante lado a lado sobre el mismo test
+    teacher.compile(metrics=['accuracy'], loss='categorical_crossentropy')
+    _, teacher_acc = teacher.evaluate(test_gen, verbose=0)
+    y_pred = distiller.predict(test_gen, verbose=0).argmax(axis=1)
+    student_acc = float(np.mean(y_pred == test_gen.classes))
+    report = {
+        "teacher": {
+            "path": str(teacher_path),
+            "input_shape": list(teacher_shape),
+            "accuracy": round(float(teacher_acc), 4),
+            "params": int(teacher.count_params()),
+            "cpu_latency_ms": cpu_latency_ms(teacher, teacher_shape),
+        },
+        "student": {
+            "width": width,
+            "input_shape": list(student_shape),
+            "accuracy": round(student_acc, 4),
+            "params": int(student.count_params()),
+            "cpu_latency_ms": cpu_latency_ms(student, student_shape),
+        },
+        "temperature": temperature,
+        "alpha": alpha,
+        "epochs": len(history.history['loss']),
+    }
+    print(f"\n{'':10s}{'precisión':>10s}{'parámetros':>13s}{'ms (CPU)':>10s}")
+    for name in ("teacher", "student"):
+        r = report[name]
+        print(f"{name:10s}{r['accuracy']:10.3f}{r['params']:13,d}{r['cpu_latency_ms']:10.2f}")
+
+    # Misma estructura que ia/models/: el backend lo carga con su propio preprocesado
+    os.makedirs(out_dir, exist_ok=True)
+    model_path = os.path.join(out_dir, 'best_model.keras')
+    student.save(model_path)
+    class_names = [k for k, v in sorted(train_gen.class_indices.items(), key=lambda x: x[1])]
+    PreprocessSpec(
+        input_shape=student_shape,
+        color_mode="grayscale",
+        normalization="samplewise",
+        interpolation="linear",
+        class_names=class_names,
+    ).save(model_path)
+    with open(os.path.join(out_dir, 'class_indices.json'), 'w', encoding='utf-8') as f:
+        json.dump({str(v): k for k, v in train_gen.class_indices.items()}, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(out_dir, 'distill_report.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print("✅ Estudiante guardado en", out_dir)
+    print(f"➡️ Para servirlo: python -m backend.inference.registry publish --source {out_dir} --activate")
+    return report
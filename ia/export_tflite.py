@@ -0,0 +1,145 @@
+# ia/export_tflite.py
+"""
+Exporta ia/models/best_model.keras a TFLite float16 e int8 y compara los tres
+modelos (Keras, fp16, int8) en data/test: accuracy, latencia por imagen y tamaño.
+- int8 se calibra con una muestra representativa de data/train
+- las imágenes salen de los shards preprocesados de ia/dataset_cache.py
+- el informe se guarda en ia/models/tflite_report.json
+
+Uso: python ia/export_tflite.py [--calib-samples 300] [--eval-limit 0] [--threads 4]
+"""
+import json
+import time
+import argparse
+from pathlib import Path
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+
+from preprocessing import PreprocessSpec
+from dataset_cache import load_split
+
+ROOT = Path(__file__).resolve().parents[1]
+MODELS_DIR = ROOT / "ia" / "models"
+MODEL_PATH = MODELS_DIR / "best_model.keras"
+CLASS_IDX_PATH = MODELS_DIR / "class_indices.json"
+FP16_PATH = MODELS_DIR / "best_model_fp16.tflite"
+INT8_PATH = MODELS_DIR / "best_model_int8.tflite"
+REPORT_PATH = MODELS_DIR / "tflite_report.json"
+DATA_TRAIN = ROOT / "data" / "train"
+DATA_TEST = ROOT / "data" / "test"
+
+
+def representative_dataset(spec, n_samples):
+    train = load_split("train", DATA_TRAIN, spec)
+    if not len(train):
+        raise SystemExit(f"No hay imágenes de calibración en {DATA_TRAIN}")
+    rng = np.random.default_rng(0)
+    picks = rng.choice(len(train), size=min(n_samples, len(train)), replace=False)
+
+    def gen():
+        for i in picks:
+            yield [train.take([i])]
+    return gen
+
+
+def export(model, spec, calib_samples):
+    conv = tf.lite.TFLiteConverter.from_keras_model(model)
+    conv.optimizations = [tf.lite.Optimize.DEFAULT]
+    conv.target_spec.supported_types = [tf.float16]
+    FP16_PATH.write_bytes(conv.convert())
+    print("✅ float16:", FP16_PATH)
+
+    conv = tf.lite.TFLiteConverter.from_keras_model(model)
+    conv.optimizations = [tf.lite.Optimize.DEFAULT]
+    conv.representative_dataset = representative_dataset(spec, calib_samples)
+    conv.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    # Entrada y salida en float32: el backend no tiene que cuantizar nada
+    INT8_PATH.write_bytes(conv.convert())
+    print("✅ int8:", INT8_PATH)
+
+
+def make_runner(kind, model, threads):
+    if kind == "keras":
+        fn = tf.function(lambda x: model(x, training=False))
+        return lambda x: fn(tf.constant(x)).numpy()
+    path = FP16_PATH if kind == "tflite_fp16" else INT8_PATH
+    interpreter = tf.lite.Interpreter(model_path=str(path), num_threads=threads)
+    interpreter.allocate_tensors()
+    inp = interpreter.get_input_details()[0]["index"]
+    out = interpreter.get_output_details()[0]["index"]
+
+    def run(x):
+        interpreter.set_tensor(inp, x)
+        interpreter.invoke()
+        return interpreter.get_tensor(out)
+    return run
+
+
+def evaluate(kind, model, samples, threads):
+    run = make_runner(kind, model, threads)
+    run(samples[0][0][np.newaxis])  # calentamiento
+    correct, times = 0, []
+    for x, y in samples:
+        start = time.perf_counter()
+        preds = run(x[np.newaxis])
+        times.append(time.perf_counter() - start)
+        correct += int(np.argmax(preds[0]) == y)
+    size = MODEL_PATH.stat().st_size if kind == "keras" else (FP16_PATH if kind == "tflite_fp16" else INT8_PATH).stat().st_size
+    return {
+        "backend": kind,
+        "accuracy": round(correct / len(samples), 4),
+        "latency_ms_p50": round(float(np.median(times)) * 1e3, 3),
+        "latency_ms_p95": round(float(np.percentile(times, 95)) * 1e3, 3),
+        "size_mb": round(size / 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calib-samples", type=int, default=300)
+    parser.add_argument("--eval-limit", type=int, default=0, help="0 = todo data/test")
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    if not MODEL_PATH.exists():
+        raise SystemExit(f"Modelo no encontrado en: {MODEL_PATH}")
+    model = load_model(str(MODEL_PATH), compile=False)
+    input_shape = tuple(model.input_shape[1:])
+    # Mismo preprocesado que en el entrenamiento y en el backend (best_model.meta.json)
+    spec = PreprocessSpec.load(MODEL_PATH, default=PreprocessSpec(input_shape))
+    with open(CLASS_IDX_PATH, "r", encoding="utf-8") as f:
+        class_indices = json.load(f)
+    class_names = [class_indices[str(i)] for i in range(len(class_indices))]
+
+    export(model, spec, args.calib_samples)
+
+    test = load_split("test", DATA_TEST, spec)
+    # Etiquetas de carpeta -> índice de salida del modelo (class_indices.json)
+    to_model = np.array([class_names.index(name) for name in test.class_names])
+    indices = np.arange(len(test))
+    if args.eval_limit:
+        rng = np.random.default_rng(0)
+        indices = np.sort(rng.choice(len(test), size=min(args.eval_limit, len(test)), replace=False))
+    samples = list(zip(test.take(indices), to_model[test.labels[indices]]))
+    if not samples:
+        raise SystemExit(f"No hay imágenes de evaluación en {DATA_TEST}")
+
+    report = {
+        "input_shape": list(input_shape),
+        "preprocessing": spec.to_dict(),
+        "test_images": len(samples),
+        "threads": args.threads,
+        "results": [evaluate(k, model, samples, args.threads) for k in ("keras", "tflite_fp16", "tflite_int8")],
+    }
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'backend':12s} {'accuracy':>9s} {'p50 (ms)':>9s} {'p95 (ms)':>9s} {'MB':>7s}")
+    for r in report["results"]:
+        print(f"{r['backend']:12s} {r['accuracy']:9.4f} {r['latency_ms_p50']:9.2f} {r['latency_ms_p95']:9.2f} {r['size_mb']:7.2f}")
+    print("\n📄 Informe guardado en", REPORT_PATH)
+
+
+if __name__ == "__main__":
+    main()
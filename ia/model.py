@@ -19,16 +19,18 @@ def conv_block(x, filters, kernel=(3,3), pool=True, drop=0.25):
         x = Dropout(drop)(x)
     return x
 
-def build_emotion_model(input_shape=(48,48,1), n_classes=7):
+def build_emotion_model(input_shape=(48,48,1), n_classes=7, width=1.0):
+    # width < 1 adelgaza todas las capas (p. ej. 0.5 para el estudiante de ia/distill.py)
+    f = lambda n: max(8, int(n * width))
     i = Input(shape=input_shape)
 
-    x = conv_block(i, 32, drop=0.2)
-    x = conv_block(x, 64, drop=0.25)
-    x = conv_block(x, 128, drop=0.3)
-    x = conv_block(x, 256, pool=True, drop=0.4)
+    x = conv_block(i, f(32), drop=0.2)
+    x = conv_block(x, f(64), drop=0.25)
+    x = conv_block(x, f(128), drop=0.3)
+    x = conv_block(x, f(256), pool=True, drop=0.4)
 
     x = GlobalAveragePooling2D()(x)
-    x = Dense(256, activation="relu")(x)
+    x = Dense(f(256), activation="relu")(x)
     x = Dropout(0.5)(x)
     out = Dense(n_classes, activation="softmax")(x)
 
@@ -0,0 +1,149 @@
+# ia/preprocessing.py
+"""
+Preprocesado único de entrada del modelo, compartido por el backend y los scripts de ia/.
+La forma de entrada, el modo de color y la normalización se leen de un archivo de
+metadatos junto al modelo (best_model.keras -> best_model.meta.json), que escribe
+train_images.py al entrenar. Solo depende de NumPy y OpenCV (nada de TensorFlow).
+
+- normalization "rescale":    x / 255
+- normalization "samplewise": x / 255, y después cada imagen con media 0 y desviación 1
+  (igual que samplewise_center + samplewise_std_normalization de ImageDataGenerator)
+"""
+import json
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+COLOR_MODES = ("grayscale", "rgb")
+NORMALIZATIONS = ("rescale", "samplewise")
+INTERPOLATIONS = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "area": cv2.INTER_AREA,
+}
+# Coeficientes de cv2.COLOR_BGR2GRAY, para convertir el lote entero de una vez
+_BGR_TO_GRAY = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+
+def metadata_path(model_path) -> Path:
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.stem + ".meta.json")
+
+
+class PreprocessSpec:
+    """Qué espera el modelo a la entrada. Sin metadatos: 48x48 en gris, x / 255 (la CNN original)."""
+
+    def __init__(self, input_shape=(48, 48, 1), color_mode=None, normalization="rescale",
+                 interpolation="linear", class_names=None):
+        self.input_shape = tuple(int(v) for v in input_shape)
+        self.color_mode = color_mode or ("grayscale" if self.input_shape[-1] == 1 else "rgb")
+        self.normalization = normalization
+        self.interpolation = interpolation
+        self.class_names = class_names
+        if self.color_mode not in COLOR_MODES:
+            raise ValueError(f"color_mode inválido: {self.color_mode}")
+        if self.normalization not in NORMALIZATIONS:
+            raise ValueError(f"normalization inválida: {self.normalization}")
+        if self.interpolation not in INTERPOLATIONS:
+            raise ValueError(f"interpolation inválida: {self.interpolation}")
+        if self.input_shape[-1] != (1 if self.color_mode == "grayscale" else 3):
+            raise ValueError(f"input_shape {self.input_shape} no cuadra con color_mode {self.color_mode}")
+
+    @property
+    def size(self):
+        """(ancho, alto) para cv2.resize."""
+        return self.input_shape[1], self.input_shape[0]
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            input_shape=data["input_shape"],
+            color_mode=data.get("color_mode"),
+            normalization=data.get("normalization", "rescale"),
+            interpolation=data.get("interpolation", "linear"),
+            class_names=data.get("class_names"),
+        )
+
+    def to_dict(self) -> dict:
+        data = {
+            "input_shape": list(self.input_shape),
+            "color_mode": self.color_mode,
+            "normalization": self.normalization,
+            "interpolation": self.interpolation,
+        }
+        if self.class_names:
+            data["class_names"] = list(self.class_names)
+        return data
+
+    @classmethod
+    def load(cls, model_path, default=None):
+        """Lee los metadatos del modelo; si no existen devuelve `default` (o la especificación por defecto)."""
+        path = metadata_path(model_path)
+        if not path.exists():
+            return default if default is not None else cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, model_path) -> Path:
+        path = metadata_path(model_path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+    def __eq__(self, other):
+        return isinstance(other, PreprocessSpec) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"PreprocessSpec({self.to_dict()})"
+
+
+# ========================
+# 🧮 Lotes
+# ========================
+def resize_batch(images, spec: PreprocessSpec) -> np.ndarray:
+    """Lista de imágenes (gris HxW o BGR HxWx3, de cualquier tamaño) -> lote uint8 al tamaño del modelo."""
+    interpolation = INTERPOLATIONS[spec.interpolation]
+    return np.stack([
+        img if img.shape[1::-1] == spec.size else cv2.resize(img, spec.size, interpolation=interpolation)
+        for img in images
+    ])
+
+
+def to_model_channels(batch: np.ndarray, spec: PreprocessSpec) -> np.ndarray:
+    """Lote (N,H,W) en gris o (N,H,W,3) en BGR -> (N,H,W,C) con los canales del modelo."""
+    if batch.ndim == 3:
+        batch = batch[..., np.newaxis]
+        # Un modelo RGB entrenado con rostros en gris recibe el gris repetido en los 3 canales
+        return np.repeat(batch, 3, axis=-1) if spec.color_mode == "rgb" else batch
+    if spec.color_mode == "rgb":
+        return batch[..., ::-1]
+    return (batch.astype(np.float32) @ _BGR_TO_GRAY)[..., np.newaxis]
+
+
+def normalize_batch(batch: np.ndarray, spec: PreprocessSpec) -> np.ndarray:
+    """Lote (N,H,W,C) en 0-255 -> float32 normalizado como en el entrenamiento."""
+    x = batch.astype(np.float32) * np.float32(1.0 / 255.0)
+    if spec.normalization == "samplewise":
+        x -= x.mean(axis=(1, 2, 3), keepdims=True)
+        x /= x.std(axis=(1, 2, 3), keepdims=True) + np.float32(1e-6)
+    return x
+
+
+def prepare_batch(images, spec: PreprocessSpec) -> np.ndarray:
+    """Recortes de rostro (gris o BGR) -> array (N, *spec.input_shape) float32 listo para el modelo."""
+    return normalize_batch(to_model_channels(resize_batch(images, spec), spec), spec)
+
+
+def load_images(paths, spec: PreprocessSpec):
+    """Lee imágenes de disco y devuelve (lote, rutas leídas); las ilegibles se saltan."""
+    flag = cv2.IMREAD_GRAYSCALE if spec.color_mode == "grayscale" else cv2.IMREAD_COLOR
+    images, ok = [], []
+    for p in paths:
+        img = cv2.imread(str(p), flag)
+        if img is not None:
+            images.append(img)
+            ok.append(p)
+    if not images:
+        return np.empty((0, *spec.input_shape), dtype=np.float32), ok
+    return prepare_batch(images, spec), ok
@@ -3,8 +3,12 @@ import cv2
 import numpy as np
 from tensorflow.keras.models import load_model
 
+from preprocessing import PreprocessSpec, prepare_batch
+
 # Cargar el modelo entrenado
-model = load_model('models/best_model.keras')  # ajusta la ruta si guardaste en otra carpeta
+MODEL_PATH = 'models/best_model.keras'  # ajusta la ruta si guardaste en otra carpeta
+model = load_model(MODEL_PATH)
+spec = PreprocessSpec.load(MODEL_PATH, default=PreprocessSpec(model.input_shape[1:]))
 
 # Clases en el orden del dataset
 EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'neutral', 'sad', 'surprise']
@@ -22,20 +26,18 @@ while True:
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
     faces = face_cascade.detectMultiScale(gray, 1.3, 5)
 
-    for (x, y, w, h) in faces:
-        roi = gray[y:y+h, x:x+w]
-        roi = cv2.resize(roi, (48, 48))
-        roi = roi.astype("float32") / 255.0
-        roi = np.expand_dims(roi, axis=-1)
-        roi = np.expand_dims(roi, axis=0)
+    if len(faces) > 0:
+        # Todos los rostros del frame en un solo predict
+        rois = prepare_batch([gray[y:y+h, x:x+w] for (x, y, w, h) in faces], spec)
+        all_preds = model.predict(rois, verbose=0)
 
-        preds = model.predict(roi, verbose=0)[0]
-        label = EMOTIONS[np.argmax(preds)]
-        conf = np.max(preds)
+        for (x, y, w, h), preds in zip(faces, all_preds):
+            label = EMOTIONS[np.argmax(preds)]
+            conf = np.max(preds)
 
-        cv2.putText(frame, f"{label} {conf:.2f}", (x, y-10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-        cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
+            cv2.putText(frame, f"{label} {conf:.2f}", (x, y-10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+            cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
 
     cv2.imshow("EMOTIA - Detección en tiempo real", frame)
     if cv2.waitKey(1) & 0xFF == ord('q'):
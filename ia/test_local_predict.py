@@ -1,10 +1,11 @@
 # ia/test_local_predict.py
 import sys, os, json
 from pathlib import Path
-import numpy as np
 import cv2
 from tensorflow.keras.models import load_model
 
+from preprocessing import PreprocessSpec, prepare_batch
+
 ROOT = Path(__file__).resolve().parents[1]  # EMOTIA/
 MODEL_PATH = ROOT / "ia" / "models" / "best_model.keras"
 CLASS_IDX_PATH = ROOT / "ia" / "models" / "class_indices.json"
@@ -12,6 +13,8 @@ CLASS_IDX_PATH = ROOT / "ia" / "models" / "class_indices.json"
 if not MODEL_PATH.exists():
     raise SystemExit(f"Modelo no encontrado en: {MODEL_PATH}")
 model = load_model(str(MODEL_PATH), compile=False)
+# Forma, color y normalización con las que se entrenó el modelo
+SPEC = PreprocessSpec.load(MODEL_PATH, default=PreprocessSpec(model.input_shape[1:]))
 
 if CLASS_IDX_PATH.exists():
     with open(CLASS_IDX_PATH, "r", encoding="utf-8") as f:
@@ -36,9 +39,7 @@ def preprocess(img_path):
         sx = w_img//2 - m//2
         sy = h_img//2 - m//2
         roi = gray[sy:sy+m, sx:sx+m]
-    roi = cv2.resize(roi, (48,48)).astype("float32") / 255.0
-    roi = np.expand_dims(np.expand_dims(roi, -1), 0)  # (1,48,48,1)
-    return roi
+    return prepare_batch([roi], SPEC)  # (1, *SPEC.input_shape)
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
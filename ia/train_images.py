@@ -1,6 +1,11 @@
 # ia/train_images.py
+# Uso: python ia/train_images.py                  (MobileNetV2, el modelo de siempre)
+#      python ia/train_images.py --distill        (CNN pequeña destilada de best_model.keras)
+#      --pipeline tfdata                           (tf.data en vez de ImageDataGenerator; o "cache")
 import os
+import sys
 import json
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.utils.class_weight import compute_class_weight
@@ -8,16 +13,29 @@ from sklearn.metrics import classification_report, confusion_matrix
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, ReduceLROnPlateau
 
-from data_loader_images import load_dataset
+from data_loader_images import load_dataset, DATA_PIPELINE, PIPELINES
 from model_tl import build_tl_model   # <-- nuevo
+from preprocessing import PreprocessSpec
 #from model import build_emotion_model  # fallback si quieres usar tu CNN
 
+parser = argparse.ArgumentParser()
+parser.add_argument("--pipeline", choices=PIPELINES, default=DATA_PIPELINE, help="cómo se cargan las imágenes")
+parser.add_argument("--distill", action="store_true", help="entrenar un estudiante pequeño contra el modelo ya entrenado")
+parser.add_argument("--teacher", default="ia/models/best_model.keras")
+parser.add_argument("--student-out", default="ia/models/student", help="directorio del estudiante exportado")
+parser.add_argument("--student-width", type=float, default=0.5, help="fracción de filtros de ia/model.py")
+parser.add_argument("--student-size", type=int, default=48)
+parser.add_argument("--temperature", type=float, default=4.0)
+parser.add_argument("--alpha", type=float, default=0.1, help="peso de la etiqueta real frente al profesor")
+parser.add_argument("--epochs", type=int, default=100, help="épocas de la destilación")
+args = parser.parse_args()
+
 BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 train_dir = os.path.join(BASE_DIR, "train")
 test_dir = os.path.join(BASE_DIR, "test")
 
 # 1) cargar datos
-train_gen, val_gen, test_gen = load_dataset(train_dir, test_dir, img_size=(96,96), batch_size=64)
+train_gen, val_gen, test_gen = load_dataset(train_dir, test_dir, img_size=(96,96), batch_size=64, pipeline=args.pipeline)
 
 # 2) class weights
 labels = train_gen.classes
@@ -29,6 +47,20 @@ class_weights_values = compute_class_weight(
 class_weights = dict(enumerate(class_weights_values))
 print("✅ Class weights:", class_weights)
 
+if args.distill:
+    from distill import run_distillation
+    run_distillation(
+        train_gen, val_gen, test_gen, class_weights,
+        teacher_path=args.teacher,
+        out_dir=args.student_out,
+        width=args.student_width,
+        student_size=args.student_size,
+        temperature=args.temperature,
+        alpha=args.alpha,
+        epochs=args.epochs,
+    )
+    sys.exit(0)
+
 # 3) build model (fase 1: feature extractor)
 model = build_tl_model(input_shape=(96,96,3), n_classes=7)
 model.compile(optimizer=Adam(1e-3), loss='categorical_crossentropy', metrics=['accuracy'])
@@ -104,6 +136,19 @@ os.makedirs('models', exist_ok=True)
 with open('ia/models/class_indices.json', 'w', encoding='utf-8') as f:
     json.dump(inv, f, ensure_ascii=False, indent=2)
 
+# 10b) metadatos de preprocesado junto a cada modelo: el backend y los scripts de ia/
+# preparan la entrada igual que load_dataset (96x96 RGB, samplewise, resize "nearest")
+spec = PreprocessSpec(
+    input_shape=(96, 96, 3),
+    color_mode="rgb",
+    normalization="samplewise",
+    interpolation="nearest",
+    class_names=class_names,
+)
+for path in ('ia/models/best_model.keras', 'ia/models/final_model.keras'):
+    print("✅ Metadatos de preprocesado:", spec.save(path))
+print("➡️ Para servirlo sin reiniciar el backend: python -m backend.inference.registry publish --activate")
+
 # 11) curvas
 plt.figure(figsize=(12,5))
 # accuracy (phase1+ft combined if available)
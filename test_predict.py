@@ -1,23 +1,35 @@
 # test_predict.py  (guardar en la raíz EMOTIA/)
 import requests
 import sys
+import json
 from pathlib import Path
 
 if len(sys.argv) < 2:
-    print("Uso: python test_predict.py ruta/a/imagen.jpg")
+    print("Uso: python test_predict.py ruta/a/imagen.jpg [más imágenes...]")
     sys.exit(1)
 
-img_path = Path(sys.argv[1])
-if not img_path.exists():
-    print("No existe:", img_path)
-    sys.exit(1)
+img_paths = [Path(p) for p in sys.argv[1:]]
+for img_path in img_paths:
+    if not img_path.exists():
+        print("No existe:", img_path)
+        sys.exit(1)
 
 url = "http://127.0.0.1:8000/predict"
-with open(img_path, "rb") as f:
-    files = {"file": (img_path.name, f, "image/jpeg")}
-    r = requests.post(url, files=files)
-print("HTTP", r.status_code)
-try:
-    print(r.json())
-except Exception:
-    print(r.text)
+if len(img_paths) == 1:
+    img_path = img_paths[0]
+    with open(img_path, "rb") as f:
+        files = {"file": (img_path.name, f, "image/jpeg")}
+        r = requests.post(url, files=files)
+    print("HTTP", r.status_code)
+    try:
+        print(r.json())
+    except Exception:
+        print(r.text)
+else:
+    # Varias imágenes: una línea JSON por imagen según terminan, y el resumen al final
+    files = [("files", (p.name, open(p, "rb"), "image/jpeg")) for p in img_paths]
+    with requests.post(url, files=files, stream=True) as r:
+        print("HTTP", r.status_code)
+        for line in r.iter_lines():
+            if line:
+                print(json.loads(line))